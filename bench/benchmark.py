@@ -0,0 +1,214 @@
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+import timeit
+
+import numpy as np
+
+from src.cube import MOVES, Cube, Macro, calculate_fitness
+from src.solver import PERMUTATIONS, SINGLE_MOVES, Solver
+
+# Benchmarks for the cube engine and the solver.
+#   python -m bench.benchmark -o results.json
+#   python -m bench.benchmark -o new.json --baseline results.json
+# Micro benchmarks report the time per call, macro benchmarks solve a fixed, seeded set of scrambles
+# several times and report the distribution of the time to solution and the solve rate.
+
+# the scrambles from solver.main()
+SCRAMBLES = [
+    "R' U' L2 B2 U2 F L2 B' L' B D R B F2 L F R' B2 F' L B' D B2 R2 D' U B2 F' D R2",
+    "U2 B' F L B' F2 D' U B2 R' U B' F U F' R' U2 L' R' D F2 R' F' D2 L' R2 B' D L U2",
+    "B' R' U2 B' F D2 R2 B F' L2 R' B2 D2 L2 F' U L B2 D F L' F R B2 D' U' B' L' B' F2",
+    "F2 D2 U L' R' B2 L2 R2 B F L D' L2 D U' L' D' B2 D2 R' U L R' D' U L' R2 U F' L'",
+    "D' B2 D2 L2 U' L R' F L2 R2 U' L2 B' L D' B2 R2 B' R F U2 R B2 F' L' B2 L2 R F2 L'",
+]
+
+POPULATION_SIZE = 500
+MAX_GENERATIONS = 300
+MAX_RESETS = 10
+ELITISM_NUM = 50
+
+
+def random_scrambles(n, length=30, seed=0):
+    rng = np.random.default_rng(seed)
+    return [" ".join(rng.choice(SINGLE_MOVES, size=length)) for _ in range(n)]
+
+
+def distribution(values):
+    values = sorted(values)
+    if not values:
+        return {}
+    return {
+        "min": values[0],
+        "median": statistics.median(values),
+        "mean": statistics.fmean(values),
+        "p90": values[min(len(values) - 1, int(0.9 * len(values)))],
+        "max": values[-1],
+    }
+
+
+# time per call of stmt, in seconds, over several repeats
+def measure(stmt, number, repeat):
+    times = timeit.repeat(stmt, number=number, repeat=repeat)
+    return distribution([t / number for t in times])
+
+
+# ------------------------------------------------------------------------------------
+# Micro benchmarks
+# ------------------------------------------------------------------------------------
+def micro_benchmarks(repeat, quick):
+    number = 200 if quick else 2000
+    results = {}
+
+    cube = Cube()
+    cube.execute(SCRAMBLES[0].split(" "))
+    state = cube.state
+
+    results["move/gather"] = measure(lambda: state[MOVES["R"]], number, repeat)
+    results["move/execute"] = measure(lambda: cube.execute(["R"]), number, repeat)
+    # execute keeps the history, don't let it grow with the benchmark
+    cube.move_history = cube.move_history[:1]
+
+    for i, moves in enumerate(PERMUTATIONS):
+        macro = Macro(moves)
+        results[f"permutation/{i}/execute"] = measure(lambda: cube.execute(moves), number // 10, repeat)
+        results[f"permutation/{i}/apply"] = measure(lambda: cube.apply(macro), number, repeat)
+        cube.move_history = cube.move_history[:1]
+
+    results["fitness/cube"] = measure(lambda: calculate_fitness(state), number, repeat)
+
+    solver = Solver(POPULATION_SIZE, 1, 1, ELITISM_NUM)
+    population = solver.create_population()
+    population.reset(state)
+    population.apply(np.random.default_rng(0).integers(0, len(solver.macros), size=POPULATION_SIZE))
+    rows = np.random.default_rng(1).integers(0, POPULATION_SIZE, size=POPULATION_SIZE)
+    mutations = np.random.default_rng(2).integers(len(SINGLE_MOVES), len(solver.macros), size=POPULATION_SIZE)
+
+    results["fitness/population"] = measure(lambda: calculate_fitness(population.states), number // 10, repeat)
+    # what Solver.__copy used to do for every cube, now one copy for the whole population
+    results["population/copy"] = measure(lambda: population.select(rows), number // 10, repeat)
+    results["population/mutate"] = measure(lambda: population.apply(mutations), number // 10, repeat)
+    results["generation"] = generation_benchmark(repeat, quick)
+
+    return results
+
+
+# a full generation step: evaluate, sort, select, copy and mutate
+def generation_benchmark(repeat, quick):
+    generations = 50 if quick else 300
+    solver = Solver(POPULATION_SIZE, generations, 1, ELITISM_NUM)
+    population = solver.create_population()
+    scrambled = Cube()
+    scrambled.execute(SCRAMBLES[0].split(" "))
+
+    times = []
+    for r in range(repeat):
+        solver.rng = np.random.default_rng(r)
+        count = [0]
+
+        def on_generation(p, g):
+            count[0] += 1
+
+        start = time.perf_counter()
+        solver.evolve(population, scrambled.state, 0, on_generation)
+        times.append((time.perf_counter() - start) / max(count[0], 1))
+
+    return distribution(times)
+
+
+# ------------------------------------------------------------------------------------
+# Macro benchmarks
+# ------------------------------------------------------------------------------------
+def macro_benchmarks(runs, quick, extra_scrambles):
+    scrambles = SCRAMBLES + random_scrambles(extra_scrambles)
+    solver = Solver(POPULATION_SIZE, MAX_GENERATIONS, 2 if quick else MAX_RESETS, ELITISM_NUM)
+
+    results = {}
+    seconds, generations, solved = [], [], 0
+    for s, scramble_str in enumerate(scrambles):
+        scramble = scramble_str.split(" ")
+        scramble_seconds = []
+        for run in range(runs):
+            result = solver.solve(scramble, seed=1000 * s + run)
+            if result.is_solved:
+                solved += 1
+                scramble_seconds.append(result.seconds)
+                generations.append(result.generations)
+            seconds.append(result.seconds)
+
+        results[f"solve/{s}"] = {"scramble": scramble_str, "solve_rate": len(scramble_seconds) / runs,
+                                 "seconds": distribution(scramble_seconds)}
+
+    results["solve/all"] = {"solve_rate": solved / (runs * len(scrambles)),
+                            "seconds": distribution(seconds),
+                            "generations": distribution(generations)}
+    return results
+
+
+# ------------------------------------------------------------------------------------
+# Comparison
+# ------------------------------------------------------------------------------------
+def compare(results, baseline):
+    print(f"{'benchmark':<32} {'baseline':>12} {'current':>12} {'ratio':>8}")
+
+    for section in ("micro", "macro"):
+        for name, current in results.get(section, {}).items():
+            previous = baseline.get(section, {}).get(name)
+            if previous is None:
+                continue
+
+            # micro benchmarks are distributions, macro ones keep them under seconds
+            current = current.get("seconds", current)
+            previous = previous.get("seconds", previous)
+            if "median" not in current or "median" not in previous:
+                continue
+
+            ratio = current["median"] / previous["median"] if previous["median"] else float("nan")
+            print(f"{name:<32} {previous['median']:>12.3e} {current['median']:>12.3e} {ratio:>8.2f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks for the cube engine and the solver.")
+    parser.add_argument("-o", "--output", help="write the results to this JSON file")
+    parser.add_argument("-b", "--baseline", help="JSON file from a previous run to compare with")
+    parser.add_argument("--only", choices=["micro", "macro"])
+    parser.add_argument("--runs", type=int, default=5, help="solves per scramble in the macro benchmarks")
+    parser.add_argument("--repeat", type=int, default=7, help="repeats of each micro benchmark")
+    parser.add_argument("--extra-scrambles", type=int, default=5, help="seeded random scrambles to add")
+    parser.add_argument("--quick", action="store_true", help="fewer iterations, for a smoke test")
+    args = parser.parse_args(argv)
+
+    results = {
+        "python": sys.version.split(" ")[0],
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+    }
+
+    if args.only in (None, "micro"):
+        results["micro"] = micro_benchmarks(args.repeat, args.quick)
+    if args.only in (None, "macro"):
+        results["macro"] = macro_benchmarks(args.runs, args.quick, args.extra_scrambles)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            compare(results, json.load(f))
+    else:
+        for section in ("micro", "macro"):
+            for name, values in results.get(section, {}).items():
+                values = values.get("seconds", values)
+                if "median" in values:
+                    print(f"{name:<32} {values['median']:>12.3e} s")
+        if "macro" in results:
+            print(f"solve rate: {results['macro']['solve/all']['solve_rate']:.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from src.solver import FITNESS_FUNCTIONS, Solver
+
+# Solves a file of scrambles, one per line, and writes one JSON line per scramble as soon as it is solved.
+# For example: python -m src.batch scrambles.txt -o solutions.jsonl
+# The input is read lazily and only a few scrambles per worker are in flight at any time,
+# so memory doesn't depend on the size of the file, and results come out in the order they finish.
+
+_solver = None
+
+
+# The entry points of a worker process, also used by src.service: init_worker is the initializer of the
+# pool and makes the solver of the process, solve_scramble solves one scramble with it.
+def init_worker(solver_args, fitness):
+    global _solver
+    _solver = Solver(*solver_args, fitness=fitness)
+
+
+# with a seed, each scramble gets its own stream that only depends on the seed and the line,
+# so the results don't depend on which worker solved it.
+# "scramble" is the line as it was written, "normalized" the moves it was read as.
+def solve_scramble(line, scramble_str, seed):
+    try:
+        result = _solver.solve(scramble_str, seed=None if seed is None else (seed, line))
+    except ValueError as e:
+        # one bad line shouldn't stop the whole batch
+        return {"line": line, "scramble": scramble_str, "solved": False, "error": str(e)}
+
+    record = result.to_dict()
+    return {"line": line, "scramble": scramble_str, "normalized": record.pop("scramble"), **record}
+
+
+def read_scrambles(lines):
+    for i, line in enumerate(lines, start=1):
+        line = line.strip()
+        if line and not line.startswith("#"):
+            yield i, line
+
+
+def solve_stream(lines, output, solver_args, workers=None, in_flight_per_worker=2, seed=None, fitness="stickers"):
+    workers = workers or os.cpu_count()
+    limit = workers * in_flight_per_worker
+    scrambles = read_scrambles(lines)
+    pending = set()
+
+    with ProcessPoolExecutor(workers, initializer=init_worker, initargs=(solver_args, fitness)) as pool:
+        while True:
+            for line, scramble_str in scrambles:
+                pending.add(pool.submit(solve_scramble, line, scramble_str, seed))
+                if len(pending) >= limit:
+                    break
+
+            if not pending:
+                return
+
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                output.write(json.dumps(future.result()) + "\n")
+            output.flush()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Solves scrambles from a file or stdin, one per line.")
+    parser.add_argument("input", nargs="?", default="-", help="file with one scramble per line, - for stdin")
+    parser.add_argument("-o", "--output", default="-", help="file for the JSON lines, - for stdout")
+    parser.add_argument("-w", "--workers", type=int, default=None)
+    parser.add_argument("--population-size", type=int, default=500)
+    parser.add_argument("--max-generations", type=int, default=300)
+    parser.add_argument("--max-resets", type=int, default=10)
+    parser.add_argument("--elitism-num", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=None, help="makes the solutions reproducible")
+    parser.add_argument("--fitness", choices=FITNESS_FUNCTIONS, default="stickers",
+                        help="pattern needs the tables from: python -m src.patterns build")
+    args = parser.parse_args(argv)
+
+    solver_args = (args.population_size, args.max_generations, args.max_resets, args.elitism_num)
+    lines = sys.stdin if args.input == "-" else open(args.input)
+    output = sys.stdout if args.output == "-" else open(args.output, "w")
+
+    try:
+        solve_stream(lines, output, solver_args, args.workers, seed=args.seed, fitness=args.fitness)
+    finally:
+        if lines is not sys.stdin:
+            lines.close()
+        if output is not sys.stdout:
+            output.close()
+
+
+if __name__ == '__main__':
+    main()
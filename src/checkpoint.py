@@ -0,0 +1,63 @@
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+
+# A checkpoint is a single uncompressed .npz: a few small arrays, so writing one takes about a millisecond.
+# It is written to a temporary file next to the old one and renamed over it, so a process that gets killed
+# leaves the old checkpoint or the new one, never half of one.
+
+
+def save(path, **arrays):
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, temporary = tempfile.mkstemp(dir=directory, prefix=".checkpoint-", suffix=".npz")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.savez(f, **arrays)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+
+
+def load(path):
+    with np.load(path) as data:
+        return {name: data[name] for name in data.files}
+
+
+# the state of a generator as an array of text, set_rng_state puts it back
+def rng_state(rng):
+    return np.array(json.dumps(rng.bit_generator.state))
+
+
+def set_rng_state(rng, state):
+    rng.bit_generator.state = json.loads(str(state))
+
+
+class Checkpointer:
+    # Saves a checkpoint to path when at least interval seconds went by since the last one.
+    # fields are saved with every checkpoint, besides the arrays passed to save. A field that is a function
+    # is called at each save, for the values that keep changing, like the time spent so far.
+
+    def __init__(self, path, interval):
+        self.path = path
+        self.interval = interval
+        self.fields = {}
+        self.__last = time.perf_counter()
+
+    def due(self):
+        return time.perf_counter() - self.__last >= self.interval
+
+    def save(self, **arrays):
+        fields = {name: value() if callable(value) else value for name, value in self.fields.items()}
+        save(self.path, **fields, **arrays)
+        self.__last = time.perf_counter()
+
+    def remove(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
@@ -18,304 +18,328 @@ BOTTOM = "Bottom"
 CLOCKWISE = (1, 0)
 COUNTERCLOCKWISE = (0, 1)
 
+# The whole cube is a flat array of 54 stickers, 9 per face, in this face order.
+# Each face is stored row by row, exactly like the 3x3 matrices used to be.
+FACES = (FRONT, LEFT, BACK, RIGHT, TOP, BOTTOM)
+FACE_INDEX = {face: i for i, face in enumerate(FACES)}
+
+# sticker values are indexes into this array
+COLORS = np.array([GREEN, ORANGE, BLUE, RED, WHITE, YELLOW])
+
+STICKERS = 54
+
+SOLVED_STATE = np.repeat(np.arange(len(FACES), dtype=np.uint8), 9)
+SOLVED_STATE.flags.writeable = False
+
+# position of the center of each face, and of the face each sticker is on
+FACE_CENTERS = np.arange(len(FACES)) * 9 + 4
+CENTERS = np.repeat(FACE_CENTERS, 9)
+
+ROW = 0
+COL = 1
+
+
+# a state hashes to the dot product of its stickers with these weights, modulo 2 ** 64.
+# Two different states get the same hash with a probability of about 2 ** -60.
+def hash_weights(stickers):
+    weights = np.random.default_rng(0x5EED).integers(0, 1 << 63, size=stickers, dtype=np.uint64) * 2 + 1
+    weights.flags.writeable = False
+    return weights
+
+
+HASH_WEIGHTS = hash_weights(STICKERS)
+
+
+# ------------------------------------------------------------------------------------
+# Move tables
+#
+# A move is a permutation p of the 54 sticker positions: new_state = state[p], which
+# means that position i receives the sticker that was at position p[i].
+# The tables are built once, by turning a cube whose stickers are their own positions.
+# ------------------------------------------------------------------------------------
+def identity():
+    return np.arange(STICKERS, dtype=np.intp)
+
+
+def compose(first, second):
+    # applying first and then second is the same as applying first[second]
+    return first[second]
+
+
+def inverse(permutation):
+    return np.argsort(permutation).astype(np.intp)
+
+
+def _turn(rotated_face, strips):
+    # rotated_face: face rotated clockwise, or None for slice moves
+    # strips: list of 4-tuples
+    # Index 0 = face
+    # Index 1 = ROW or COL
+    # Index 2 = row or col index
+    # Index 3 = boolean, flip values when they leave the strip
+    # This means: put strip 1 into strip 2, strip 2 into strip 3, strip 3 into strip 4, strip 4 into strip 1
+    faces = identity().reshape(len(FACES), 3, 3)
+
+    if rotated_face is not None:
+        i = FACE_INDEX[rotated_face]
+        faces[i] = np.rot90(faces[i], axes=CLOCKWISE)
+
+    def strip(face, kind, index):
+        f = faces[FACE_INDEX[face]]
+        return f[index] if kind == ROW else f[:, index]
+
+    values = []
+    for face, kind, index, flip in strips:
+        s = strip(face, kind, index).copy()
+        values.append(np.flip(s) if flip else s)
+
+    for k, (face, kind, index, _) in enumerate(strips):
+        strip(face, kind, index)[:] = values[k - 1]
+
+    return faces.reshape(STICKERS)
+
+
+def _build_moves():
+    base = {
+        # X Axis movements - D, E and U
+        "D": _turn(BOTTOM, [(FRONT, ROW, 2, False), (RIGHT, ROW, 2, False),
+                            (BACK, ROW, 2, False), (LEFT, ROW, 2, False)]),
+        "E": _turn(None, [(FRONT, ROW, 1, False), (RIGHT, ROW, 1, False),
+                          (BACK, ROW, 1, False), (LEFT, ROW, 1, False)]),
+        "U": _turn(TOP, [(FRONT, ROW, 0, False), (LEFT, ROW, 0, False),
+                         (BACK, ROW, 0, False), (RIGHT, ROW, 0, False)]),
+        # Y Axis movements - L, R and M
+        "L": _turn(LEFT, [(BOTTOM, COL, 0, True), (BACK, COL, 2, True),
+                          (TOP, COL, 0, False), (FRONT, COL, 0, False)]),
+        "M": _turn(None, [(BOTTOM, COL, 1, True), (BACK, COL, 1, True),
+                          (TOP, COL, 1, False), (FRONT, COL, 1, False)]),
+        "R": _turn(RIGHT, [(BOTTOM, COL, 2, False), (FRONT, COL, 2, False),
+                           (TOP, COL, 2, True), (BACK, COL, 0, True)]),
+        # Z Axis movements - B, F and S
+        "B": _turn(BACK, [(BOTTOM, ROW, 2, True), (RIGHT, COL, 2, False),
+                          (TOP, ROW, 0, True), (LEFT, COL, 0, False)]),
+        "F": _turn(FRONT, [(BOTTOM, ROW, 0, False), (LEFT, COL, 2, True),
+                           (TOP, ROW, 2, False), (RIGHT, COL, 0, True)]),
+        "S": _turn(None, [(BOTTOM, ROW, 1, False), (LEFT, COL, 1, True),
+                          (TOP, ROW, 1, False), (RIGHT, COL, 1, True)]),
+    }
 
-class Cube:
+    # Full rotations
+    base["x"] = compose(compose(inverse(base["L"]), inverse(base["M"])), base["R"])
+    base["y"] = compose(compose(base["U"], inverse(base["E"])), inverse(base["D"]))
+    base["z"] = compose(compose(base["F"], base["S"]), inverse(base["B"]))
 
-    def __init__(self):
+    moves = {}
+    for name, p in base.items():
+        moves[name] = p
+        moves[name + "'"] = inverse(p)
+        moves[name + "2"] = compose(p, p)
 
-        self.faces = {
-            FRONT: np.full((3, 3), GREEN),
-            LEFT: np.full((3, 3), ORANGE),
-            RIGHT: np.full((3, 3), RED),
-            TOP: np.full((3, 3), WHITE),
-            BOTTOM: np.full((3, 3), YELLOW),
-            BACK: np.full((3, 3), BLUE),
-        }
-
-        self.moves_lookup = {
-            # horizontal
-            "D": self.D, "D'": self.D_prime, "D2": self.D2,
-            "E": self.E, "E'": self.E_prime, "E2": self.E2,
-            "U": self.U, "U'": self.U_prime, "U2": self.U2,
-            # vertical
-            "L": self.L, "L'": self.L_prime, "L2": self.L2,
-            "R": self.R, "R'": self.R_prime, "R2": self.R2,
-            "M": self.M, "M'": self.M_prime, "M2": self.M2,
-            # z
-            "B": self.B, "B'": self.B_prime, "B2": self.B2,
-            "F": self.F, "F'": self.F_prime, "F2": self.F2,
-            "S": self.S, "S'": self.S_prime, "S2": self.S2,
-            # full rotations
-            "x": self.x_full, "x'": self.x_prime_full, "x2": self.x2_full,
-            "y": self.y_full, "y'": self.y_prime_full, "y2": self.y2_full,
-            "z": self.z_full, "z'": self.z_prime_full, "z2": self.z2_full,
-        }
+    for p in moves.values():
+        p.flags.writeable = False
 
-        self.move_history = []
-        self.fitness = 0  # less is better, it means 0 misplaced sticker
+    return moves
 
-    # for example moves = ["L", "R", "F", "R'", "D"]
-    def execute(self, moves: 'List'):
-        for m in moves:
-            self.moves_lookup[m]()
 
-        # we assume that the first one is the scramble
-        self.move_history.append(moves)
-        self.__calculate_fitness()
+# notation -> permutation
+MOVES = _build_moves()
 
-    def __calculate_fitness(self):
-        misplaced_stickers = 0
+# Every move also has a small integer code, its index in MOVE_NAMES, and MOVE_TABLE[code] is its permutation.
+# Sequences of codes are uint8 arrays, see src.notation to turn text into them and back.
+MOVE_NAMES = list(MOVES)
+MOVE_CODES = {m: i for i, m in enumerate(MOVE_NAMES)}
+MOVE_TABLE = np.stack([MOVES[m] for m in MOVE_NAMES])
+MOVE_TABLE.flags.writeable = False
 
-        for k, face in self.faces.items():
-            # centers are fixed in a Rubik cube
-            center = face[1, 1]
 
-            for i in range(0, 3):
-                for j in range(0, 3):
-                    if face[i, j] != center:
-                        misplaced_stickers += 1
+def compile_moves(moves: 'List'):
+    permutation = identity()
+    for m in moves:
+        permutation = compose(permutation, MOVES[m])
+    permutation.flags.writeable = False
+    return permutation
 
-        self.fitness = misplaced_stickers
 
-    def is_solved(self):
-        if self.fitness == 0:
-            return True
-        return False
+def compile_codes(codes):
+    # like compile_moves, for move codes (see src.notation)
+    permutation = identity()
+    for code in codes:
+        permutation = permutation[MOVE_TABLE[code]]
+    permutation.flags.writeable = False
+    return permutation
 
-    # ------------------------------------------------------------------------------------
-    # X Axis movements - D, E and U
-    # ------------------------------------------------------------------------------------
-    def D(self):
-        self.faces[BOTTOM] = np.rot90(self.faces[BOTTOM], axes=CLOCKWISE)
-        self.__swap_x((FRONT, 2), (RIGHT, 2), (BACK, 2), (LEFT, 2))
-
-    def D_prime(self):
-        self.faces[BOTTOM] = np.rot90(self.faces[BOTTOM], axes=COUNTERCLOCKWISE)
-        self.__swap_x((FRONT, 2), (LEFT, 2), (BACK, 2), (RIGHT, 2))
-
-    def D2(self):
-        self.D()
-        self.D()
-
-    def E(self):
-        self.__swap_x((FRONT, 1), (RIGHT, 1), (BACK, 1), (LEFT, 1))
-
-    def E_prime(self):
-        self.__swap_x((FRONT, 1), (LEFT, 1), (BACK, 1), (RIGHT, 1))
-
-    def E2(self):
-        self.E()
-        self.E()
-
-    def U(self):
-        self.faces[TOP] = np.rot90(self.faces[TOP], axes=CLOCKWISE)
-        self.__swap_x((FRONT, 0), (LEFT, 0), (BACK, 0), (RIGHT, 0))
-
-    def U_prime(self):
-        self.faces[TOP] = np.rot90(self.faces[TOP], axes=COUNTERCLOCKWISE)
-        self.__swap_x((FRONT, 0), (RIGHT, 0), (BACK, 0), (LEFT, 0))
-
-    def U2(self):
-        self.U()
-        self.U()
-
-    def __swap_x(self, t1, t2, t3, t4):
-        # t1, t2, t3 and t4 are tuples
-        # index 0 = face
-        # index 1 = row index
-        # This means: put t1 into t2, t2 into t3, t3 into t4, t4 into t1
-        # we do it backwards to avoid unnecessary temporary variables
-        backup = np.array(["", "", ""])
-        self.__copy_stickers(backup, self.faces[t4[0]][t4[1]])
-        self.__copy_stickers(self.faces[t4[0]][t4[1]], self.faces[t3[0]][t3[1]])
-        self.__copy_stickers(self.faces[t3[0]][t3[1]], self.faces[t2[0]][t2[1]])
-        self.__copy_stickers(self.faces[t2[0]][t2[1]], self.faces[t1[0]][t1[1]])
-        self.__copy_stickers(self.faces[t1[0]][t1[1]], backup)
-
-    def __copy_stickers(self, destination, origin):
-        destination[0] = origin[0]
-        destination[1] = origin[1]
-        destination[2] = origin[2]
 
-    # ------------------------------------------------------------------------------------
-    # Y Axis movements - L, R and M
-    # ------------------------------------------------------------------------------------
-    def L(self):
-        self.faces[LEFT] = np.rot90(self.faces[LEFT], axes=CLOCKWISE)
-        self.__swap_y((BOTTOM, 0, True), (BACK, 2, True), (TOP, 0, False), (FRONT, 0, False))
-
-    def L_prime(self):
-        self.faces[LEFT] = np.rot90(self.faces[LEFT], axes=COUNTERCLOCKWISE)
-        self.__swap_y((BOTTOM, 0, False), (FRONT, 0, False), (TOP, 0, True), (BACK, 2, True))
-
-    def L2(self):
-        self.L()
-        self.L()
-
-    def M(self):
-        self.__swap_y((BOTTOM, 1, True), (BACK, 1, True), (TOP, 1, False), (FRONT, 1, False))
-
-    def M_prime(self):
-        self.__swap_y((BOTTOM, 1, False), (FRONT, 1, False), (TOP, 1, True), (BACK, 1, True))
-
-    def M2(self):
-        self.M()
-        self.M()
-
-    def R(self):
-        self.faces[RIGHT] = np.rot90(self.faces[RIGHT], axes=CLOCKWISE)
-        self.__swap_y((BOTTOM, 2, False), (FRONT, 2, False), (TOP, 2, True), (BACK, 0, True))
-
-    def R_prime(self):
-        self.faces[RIGHT] = np.rot90(self.faces[RIGHT], axes=COUNTERCLOCKWISE)
-        self.__swap_y((BOTTOM, 2, True), (BACK, 0, True), (TOP, 2, False), (FRONT, 2, False))
-
-    def R2(self):
-        self.R()
-        self.R()
-
-    def __swap_y(self, t1, t2, t3, t4):
-        # t1, t2, t3 and t4 are 3-tuples
-        # Index 0 = face
-        # Index 1 = column
-        # Index 2 = boolean, flip values
-        # This means: put t1 into t2, t2 into t3, t3 into t4, t4 into t1
-        backup = np.array(["", "", ""])
-
-        if t4[2]:
-            self.__copy_stickers(backup, np.flip(self.faces[t4[0]][:, t4[1]]))
-        else:
-            self.__copy_stickers(backup, self.faces[t4[0]][:, t4[1]])
+# the moves of an entry of a move history, which can be an array of codes
+def _move_names(moves):
+    return [MOVE_NAMES[code] for code in moves] if isinstance(moves, np.ndarray) else moves
 
-        if t3[2]:
-            self.__copy_stickers(self.faces[t4[0]][:, t4[1]], np.flip(self.faces[t3[0]][:, t3[1]]))
-        else:
-            self.__copy_stickers(self.faces[t4[0]][:, t4[1]], self.faces[t3[0]][:, t3[1]])
 
-        if t2[2]:
-            self.__copy_stickers(self.faces[t3[0]][:, t3[1]], np.flip(self.faces[t2[0]][:, t2[1]]))
-        else:
-            self.__copy_stickers(self.faces[t3[0]][:, t3[1]], self.faces[t2[0]][:, t2[1]])
+def calculate_fitness(states):
+    # works for a single state or for a whole population, one cube per row
+    faces = states.reshape(-1, len(FACES), 9)
+    # centers are fixed in a Rubik cube
+    return np.count_nonzero(faces != faces[:, :, 4:5], axis=(1, 2))
 
-        if t1[2]:
-            self.__copy_stickers(self.faces[t2[0]][:, t2[1]], np.flip(self.faces[t1[0]][:, t1[1]]))
-        else:
-            self.__copy_stickers(self.faces[t2[0]][:, t2[1]], self.faces[t1[0]][:, t1[1]])
 
-        self.__copy_stickers(self.faces[t1[0]][:, t1[1]], backup)
+def count_misplaced(states, positions):
+    # how many of these positions don't match their center, with a row of positions per cube
+    stickers = np.take_along_axis(states, positions, axis=-1)
+    centers = np.take_along_axis(states, CENTERS[positions], axis=-1)
+    return np.count_nonzero(stickers != centers, axis=-1)
 
-    # ------------------------------------------------------------------------------------
-    # Z Axis movements - B and F
-    # ------------------------------------------------------------------------------------
-    def B(self):
-        self.faces[BACK] = np.rot90(self.faces[BACK], axes=CLOCKWISE)
-        self.__swap_z((BOTTOM, 2, True), (RIGHT, 2, False), (TOP, 0, True), (LEFT, 0, False))
-
-    def B_prime(self):
-        self.faces[BACK] = np.rot90(self.faces[BACK], axes=COUNTERCLOCKWISE)
-        self.__swap_z((BOTTOM, 2, False), (LEFT, 0, True), (TOP, 0, False), (RIGHT, 2, True))
-
-    def B2(self):
-        self.B()
-        self.B()
-
-    def F(self):
-        self.faces[FRONT] = np.rot90(self.faces[FRONT], axes=CLOCKWISE)
-        self.__swap_z((BOTTOM, 0, False), (LEFT, 2, True), (TOP, 2, False), (RIGHT, 0, True))
-
-    def F_prime(self):
-        self.faces[FRONT] = np.rot90(self.faces[FRONT], axes=COUNTERCLOCKWISE)
-        self.__swap_z((BOTTOM, 0, True), (RIGHT, 0, False), (TOP, 2, True), (LEFT, 2, False))
-
-    def F2(self):
-        self.F()
-        self.F()
-
-    def S(self):
-        self.__swap_z((BOTTOM, 1, False), (LEFT, 1, True), (TOP, 1, False), (RIGHT, 1, True))
-
-    def S_prime(self):
-        self.__swap_z((BOTTOM, 1, True), (RIGHT, 1, False), (TOP, 1, True), (LEFT, 1, False))
-
-    def S2(self):
-        self.S()
-        self.S()
-
-    def __swap_z(self, t1, t2, t3, t4):
-        # t1, t2, t3 and t4 are 3-tuples
-        # Index 0 = face
-        # Index 1 = row or col index (moving along the Z axis involves both)
-        # Index 2 = boolean, flip values
-        # This means: put t1 into t2, t2 into t3, t3 into t4, t4 into t1
-        # we do it backwards to avoid unnecesary temporary variables
-        backup = np.array(["", "", ""])
-
-        if t4[2]:
-            self.__copy_stickers(backup, np.flip(self.faces[t4[0]][:, t4[1]]))
-        else:
-            self.__copy_stickers(backup, self.faces[t4[0]][:, t4[1]])
 
-        if t3[2]:
-            self.__copy_stickers(self.faces[t4[0]][:, t4[1]], np.flip(self.faces[t3[0]][t3[1]]))
-        else:
-            self.__copy_stickers(self.faces[t4[0]][:, t4[1]], self.faces[t3[0]][t3[1]])
+def hash_states(states, out=None, weights=HASH_WEIGHTS):
+    # one 64 bit hash per row, or a single one for a single state. Other sizes of cube need their own weights.
+    return np.matmul(states, weights, out=out)
+
+
+def affected_positions(permutation):
+    # the only stickers that can change from misplaced to placed (or the other way around) are the
+    # ones the permutation moves, and every sticker of a face whose center was moved by a slice
+    moved = permutation != identity()
+    moved |= moved[CENTERS]
+    return np.flatnonzero(moved)
+
+
+def affected_table(permutations):
+    # the affected positions of each row of permutations, padded with a center, which always matches itself
+    moved = permutations != identity()
+    moved |= moved[:, CENTERS]
+    width = max(1, int(moved.sum(axis=1).max(initial=0)))
+    positions = np.argsort(~moved, axis=1, kind="stable")[:, :width]
+    return np.where(np.take_along_axis(moved, positions, axis=1), positions, FACE_CENTERS[0])
+
+
+class Macro:
+    # A sequence of moves composed into a single permutation, so it can be applied in one step
+    # no matter how long it is. The moves are kept because they are what goes into the history.
+
+    def __init__(self, moves: 'List', permutation=None):
+        self.moves = list(moves)
+        self.permutation = compile_moves(self.moves) if permutation is None else permutation
+        self.__affected = None
+
+    # positions needed to update the fitness incrementally after applying the macro
+    @property
+    def affected(self):
+        if self.__affected is None:
+            self.__affected = affected_positions(self.permutation)
+        return self.__affected
 
-        if t2[2]:
-            self.__copy_stickers(self.faces[t3[0]][t3[1]], np.flip(self.faces[t2[0]][:, t2[1]]))
+    def then(self, other: 'Macro'):
+        return Macro(self.moves + other.moves, compose(self.permutation, other.permutation))
+
+    def __len__(self):
+        return len(self.moves)
+
+    def __str__(self):
+        return " ".join(self.moves)
+
+
+class Macros:
+    # Several sequences of macros as a single list, indexed by macro id, with the permutations of all of them
+    # in one (n, stickers) array. A sequence that has its own permutations and lengths arrays only makes a
+    # macro when one is asked for (see src.library.LibraryMacros), so a big library is not an object per
+    # algorithm.
+
+    def __init__(self, sequences):
+        self.sequences = list(sequences)
+        self.__ends = np.cumsum([len(s) for s in self.sequences])
+        self.permutations = np.concatenate([macro_permutations(s) for s in self.sequences])
+        self.permutations.flags.writeable = False
+        self.lengths = np.concatenate([_macro_lengths(s) for s in self.sequences])
+
+    def __len__(self):
+        return int(self.__ends[-1]) if len(self.__ends) > 0 else 0
+
+    def __getitem__(self, i):
+        k = int(np.searchsorted(self.__ends, i, side="right"))
+        return self.sequences[k][int(i) - int(self.__ends[k]) + len(self.sequences[k])]
+
+
+# the permutations of a sequence of macros as one (n, stickers) array
+def macro_permutations(macros):
+    permutations = getattr(macros, "permutations", None)
+    if permutations is not None:
+        return permutations
+    return np.stack([m.permutation for m in macros]) if len(macros) > 0 else np.empty((0, STICKERS), dtype=np.intp)
+
+
+def _macro_lengths(macros):
+    lengths = getattr(macros, "lengths", None)
+    return np.array([len(m) for m in macros], dtype=np.int64) if lengths is None else lengths
+
+
+class Cube:
+    # Moves never change a state in place, they make a new one, so every cube starts out sharing the
+    # read only solved state and making one costs next to nothing.
+    __slots__ = ("state", "move_history", "__fitness")
+
+    # notation -> move, the same for every cube
+    moves_lookup = MOVES
+
+    def __init__(self):
+        self.state = SOLVED_STATE
+        self.move_history = []
+        # the fitness is only calculated when someone asks for it, None means not calculated yet.
+        # A new cube is solved, so its fitness is 0.
+        self.__fitness = 0
+
+    # a cube in this state, for example a row of a population
+    @classmethod
+    def from_state(cls, state, move_history: 'List' = None):
+        cube = cls()
+        cube.state = np.array(state, dtype=np.uint8)
+        cube.move_history = [] if move_history is None else list(move_history)
+        cube.__fitness = None
+        return cube
+
+    def clone(self):
+        return self.from_state(self.state, self.move_history)
+
+    # less is better, it means 0 misplaced sticker
+    @property
+    def fitness(self):
+        if self.__fitness is None:
+            self.__fitness = int(calculate_fitness(self.state)[0])
+        return self.__fitness
+
+    # for example moves = ["L", "R", "F", "R'", "D"], or the same as an array of move codes
+    # moves are notations or an array of move codes, which are applied all at once and only turned into
+    # notations when the history is read
+    def execute(self, moves: 'List'):
+        if isinstance(moves, np.ndarray):
+            self.state = self.state[compile_codes(moves)]
         else:
-            self.__copy_stickers(self.faces[t3[0]][t3[1]], self.faces[t2[0]][:, t2[1]])
+            for m in moves:
+                self.state = self.state[self.moves_lookup[m]]
 
-        if t1[2]:
-            self.__copy_stickers(self.faces[t2[0]][:, t2[1]], np.flip(self.faces[t1[0]][t1[1]]))
+        # we assume that the first one is the scramble
+        self.move_history.append(moves)
+        self.__fitness = None
+
+    def apply(self, macro: 'Macro'):
+        if self.__fitness is None:
+            self.state = self.state[macro.permutation]
         else:
-            self.__copy_stickers(self.faces[t2[0]][:, t2[1]], self.faces[t1[0]][t1[1]])
+            # update the fitness with the stickers that the macro touches instead of counting all of them
+            affected = macro.affected
+            before = count_misplaced(self.state, affected)
+            self.state = self.state[macro.permutation]
+            self.__fitness += int(count_misplaced(self.state, affected) - before)
 
-        self.__copy_stickers(self.faces[t1[0]][t1[1]], backup)
+        self.move_history.append(macro.moves)
 
-    # ------------------------------------------------------------------------------------
-    # Full rotations
-    # ------------------------------------------------------------------------------------
-    def x_full(self):
-        self.L_prime()
-        self.M_prime()
-        self.R()
-
-    def x_prime_full(self):
-        self.L()
-        self.M()
-        self.R_prime()
-
-    def x2_full(self):
-        self.x_full()
-        self.x_full()
-
-    def y_full(self):
-        self.U()
-        self.E_prime()
-        self.D_prime()
-
-    def y_prime_full(self):
-        self.U_prime()
-        self.E()
-        self.D()
-
-    def y2_full(self):
-        self.y_full()
-        self.y_full()
-
-    def z_full(self):
-        self.F()
-        self.S()
-        self.B_prime()
-
-    def z_prime_full(self):
-        self.F_prime()
-        self.S_prime()
-        self.B()
-
-    def z2_full(self):
-        self.z_full()
-        self.z_full()
+    def is_solved(self):
+        if self.fitness == 0:
+            return True
+        return False
+
+    @property
+    def faces(self):
+        # read only view with the colors, the state is the source of truth
+        colors = COLORS[self.state].reshape(len(FACES), 3, 3)
+        return {face: colors[i] for i, face in enumerate(FACES)}
 
     # ------------------------------------------------------------------------------------
     # Util
@@ -325,14 +349,14 @@ class Cube:
         return f"{m[0, 0]} {m[0, 1]} {m[0, 2]} - {m[1, 0]} {m[1, 1]} {m[1, 2]} - {m[2, 0]} {m[2, 1]} {m[2, 2]}"
 
     def get_scramble(self):
-        return self.move_history[0]
+        return _move_names(self.move_history[0])
 
     def get_scramble_str(self):
         return " ".join(self.get_scramble())
 
     def get_algorithm(self):
         # we don't want to include the scramble
-        flat_list = [item for sublist in self.move_history[1:] for item in sublist]
+        flat_list = [item for sublist in self.move_history[1:] for item in _move_names(sublist)]
         return flat_list
 
     def get_algorithm_str(self):
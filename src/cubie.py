@@ -0,0 +1,222 @@
+import numpy as np
+from typing import List
+
+from src.cube import (COLORS, FACE_CENTERS, FACES, MOVES, SOLVED_STATE, STICKERS, Cube, Macro, calculate_fitness,
+                      compile_codes)
+
+# The cube as pieces instead of stickers: which corner and edge is in each slot and how it is twisted,
+# plus which center is on each face (slice moves and rotations move them).
+# A state is 46 small ints in a single uint8 array, laid out like this:
+#   0-7 corner permutation, 8-15 corner orientation (0-2), 16-27 edge permutation,
+#   28-39 edge orientation (0-1), 40-45 center of each face (the color of the face in the solved cube)
+# Everything works on a single state or on a whole population, one state per row.
+
+CORNER_NAMES = ["URF", "UFL", "ULB", "UBR", "DFR", "DLF", "DBL", "DRB"]
+EDGE_NAMES = ["UR", "UF", "UL", "UB", "DR", "DF", "DL", "DB", "FR", "FL", "BL", "BR"]
+
+CP = slice(0, 8)
+CO = slice(8, 16)
+EP = slice(16, 28)
+EO = slice(28, 40)
+CENTERS = slice(40, 46)
+
+CUBIES = 46
+
+# face letter of each face in FACES
+FACE_LETTERS = {"Front": "F", "Left": "L", "Back": "B", "Right": "R", "Top": "U", "Bottom": "D"}
+
+
+def _facelets(names):
+    # The sticker positions of each slot, in the same order as the letters of its name.
+    # A sticker belongs to the slot made of the faces whose turns move it.
+    letters = [FACE_LETTERS[face] for face in FACES]
+    moved_by = [{f for f in "UDLRFB" if MOVES[f][p] != p} for p in range(STICKERS)]
+
+    facelets = np.empty((len(names), len(names[0])), dtype=np.intp)
+    for i, name in enumerate(names):
+        for k, letter in enumerate(name):
+            facelets[i, k] = next(p for p in range(STICKERS)
+                                  if letters[p // 9] == letter and moved_by[p] == set(name))
+    return facelets
+
+
+# CORNER_FACELETS[slot][k] is the position of the k-th sticker of the corner slot
+CORNER_FACELETS = _facelets(CORNER_NAMES)
+EDGE_FACELETS = _facelets(EDGE_NAMES)
+
+# the colors of each piece, in the solved cube the color of a sticker is its face
+CORNER_COLORS = SOLVED_STATE[CORNER_FACELETS]
+EDGE_COLORS = SOLVED_STATE[EDGE_FACELETS]
+
+SOLVED_CUBIES = np.concatenate([np.arange(8), np.zeros(8), np.arange(12), np.zeros(12),
+                                np.arange(len(FACES))]).astype(np.uint8)
+SOLVED_CUBIES.flags.writeable = False
+
+
+def _lookup(colors):
+    # colors of the stickers of a slot, as a base 6 number -> piece and orientation, -1 if there is no such piece.
+    # A piece with orientation o shows its color (k - o) % n on the k-th sticker of the slot.
+    n = colors.shape[1]
+    pieces = np.full(6 ** n, -1, dtype=np.intp)
+    orientations = np.full(6 ** n, -1, dtype=np.intp)
+    for piece, piece_colors in enumerate(colors):
+        for o in range(n):
+            shown = [piece_colors[(k - o) % n] for k in range(n)]
+            code = sum(int(c) * 6 ** (n - 1 - k) for k, c in enumerate(shown))
+            pieces[code] = piece
+            orientations[code] = o
+    return pieces, orientations
+
+
+_CORNER_PIECES, _CORNER_ORIENTATIONS = _lookup(CORNER_COLORS)
+_EDGE_PIECES, _EDGE_ORIENTATIONS = _lookup(EDGE_COLORS)
+
+
+def to_cubies(states):
+    # stickers -> pieces, raises ValueError if the stickers don't make valid pieces
+    states = np.asarray(states)
+    cubies = np.empty(states.shape[:-1] + (CUBIES,), dtype=np.uint8)
+
+    corners = states[..., CORNER_FACELETS].astype(np.intp) @ np.array([36, 6, 1])
+    edges = states[..., EDGE_FACELETS].astype(np.intp) @ np.array([6, 1])
+    if (_CORNER_PIECES[corners] < 0).any() or (_EDGE_PIECES[edges] < 0).any():
+        raise ValueError("The stickers don't make a valid cube")
+
+    cubies[..., CP] = _CORNER_PIECES[corners]
+    cubies[..., CO] = _CORNER_ORIENTATIONS[corners]
+    cubies[..., EP] = _EDGE_PIECES[edges]
+    cubies[..., EO] = _EDGE_ORIENTATIONS[edges]
+    cubies[..., CENTERS] = states[..., FACE_CENTERS]
+    return cubies
+
+
+def to_facelets(cubies):
+    # pieces -> stickers, the inverse of to_cubies
+    cubies = np.asarray(cubies)
+    states = np.empty(cubies.shape[:-1] + (STICKERS,), dtype=np.uint8)
+
+    k = np.arange(3)
+    states[..., CORNER_FACELETS] = CORNER_COLORS[cubies[..., CP, None], (k - cubies[..., CO, None]) % 3]
+    k = np.arange(2)
+    states[..., EDGE_FACELETS] = EDGE_COLORS[cubies[..., EP, None], (k - cubies[..., EO, None]) % 2]
+    states[..., FACE_CENTERS] = cubies[..., CENTERS]
+    return states
+
+
+def multiply(a, b):
+    # a and then b, like compose for sticker permutations. b is usually a move.
+    a, b = np.broadcast_arrays(a, b)
+    result = np.empty_like(a)
+
+    corners = b[..., CP].astype(np.intp)
+    result[..., CP] = np.take_along_axis(a[..., CP], corners, axis=-1)
+    result[..., CO] = (np.take_along_axis(a[..., CO], corners, axis=-1) + b[..., CO]) % 3
+
+    edges = b[..., EP].astype(np.intp)
+    result[..., EP] = np.take_along_axis(a[..., EP], edges, axis=-1)
+    result[..., EO] = (np.take_along_axis(a[..., EO], edges, axis=-1) + b[..., EO]) % 2
+
+    result[..., CENTERS] = np.take_along_axis(a[..., CENTERS], b[..., CENTERS].astype(np.intp), axis=-1)
+    return result
+
+
+def _parity(permutations):
+    # 0 for even permutations, 1 for odd ones, by counting inversions
+    p = permutations.astype(np.intp)
+    inversions = (p[..., :, None] > p[..., None, :]) & np.triu(np.ones(p.shape[-1], dtype=bool), 1)
+    return np.count_nonzero(inversions, axis=(-2, -1)) % 2
+
+
+def is_solvable(cubies):
+    # whether the pieces can be solved with moves: every piece once, the twists and flips add up,
+    # and the permutations have the same parity (slices swap edges and centers together)
+    cubies = np.asarray(cubies)
+    valid = (np.sort(cubies[..., CP], axis=-1) == np.arange(8)).all(axis=-1)
+    valid &= (np.sort(cubies[..., EP], axis=-1) == np.arange(12)).all(axis=-1)
+    valid &= (np.sort(cubies[..., CENTERS], axis=-1) == np.arange(len(FACES))).all(axis=-1)
+    valid &= (cubies[..., CO] < 3).all(axis=-1) & (cubies[..., EO] < 2).all(axis=-1)
+    valid &= cubies[..., CO].sum(axis=-1, dtype=np.intp) % 3 == 0
+    valid &= cubies[..., EO].sum(axis=-1, dtype=np.intp) % 2 == 0
+    valid &= (_parity(cubies[..., CP]) + _parity(cubies[..., EP]) + _parity(cubies[..., CENTERS])) % 2 == 0
+    return valid
+
+
+def _build_moves():
+    # what a move does to the solved cube is the move itself
+    moves = {}
+    for name, permutation in MOVES.items():
+        moves[name] = to_cubies(SOLVED_STATE[permutation])
+        moves[name].flags.writeable = False
+    return moves
+
+
+# notation -> move, for every notation in MOVES
+CUBIE_MOVES = _build_moves()
+
+
+def compile_cubie_moves(moves: 'List'):
+    cubies = SOLVED_CUBIES
+    for m in moves:
+        cubies = multiply(cubies, CUBIE_MOVES[m])
+    return cubies
+
+
+class CubieCube(Cube):
+    # The same cube as Cube with the pieces as state, the stickers are only built to show it
+    # or to count the misplaced ones.
+    __slots__ = ("__fitness",)
+
+    moves_lookup = CUBIE_MOVES
+
+    def __init__(self):
+        super().__init__()
+        self.state = SOLVED_CUBIES
+        self.__fitness = 0
+
+    # state is the pieces
+    @classmethod
+    def from_state(cls, state, move_history: 'List' = None):
+        cubie_cube = super().from_state(state, move_history)
+        cubie_cube.__fitness = None
+        return cubie_cube
+
+    @classmethod
+    def from_cube(cls, cube: 'Cube'):
+        return cls.from_state(to_cubies(cube.state), cube.move_history)
+
+    def to_cube(self):
+        return Cube.from_state(self.facelets, self.move_history)
+
+    @property
+    def facelets(self):
+        return to_facelets(self.state)
+
+    @property
+    def fitness(self):
+        if self.__fitness is None:
+            self.__fitness = int(calculate_fitness(self.facelets)[0])
+        return self.__fitness
+
+    def execute(self, moves: 'List'):
+        if isinstance(moves, np.ndarray):
+            self.state = multiply(self.state, to_cubies(SOLVED_STATE[compile_codes(moves)]))
+        else:
+            for m in moves:
+                self.state = multiply(self.state, self.moves_lookup[m])
+
+        # we assume that the first one is the scramble
+        self.move_history.append(moves)
+        self.__fitness = None
+
+    def apply(self, macro: 'Macro'):
+        self.state = multiply(self.state, to_cubies(SOLVED_STATE[macro.permutation]))
+        self.move_history.append(macro.moves)
+        self.__fitness = None
+
+    def is_solvable(self):
+        return bool(is_solvable(self.state))
+
+    @property
+    def faces(self):
+        colors = COLORS[self.facelets].reshape(len(FACES), 3, 3)
+        return {face: colors[i] for i, face in enumerate(FACES)}
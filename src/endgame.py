@@ -0,0 +1,99 @@
+import time
+from typing import List
+
+import numpy as np
+
+from src.cube import Macro, affected_positions, calculate_fitness, compose, hash_states, inverse
+from src.symmetry import ORIENTATIONS
+
+# Finishes a cube that is only a few stickers away from solved with an exact search (IDA*) over macros,
+# instead of waiting for the mutations to get there by chance.
+# The cost of a path is the number of macros and the lower bound of the cost to solve a cube is
+#   misplaced stickers / most stickers a single macro can fix
+# Every node expands all its children at once: one gather for the states, one count of the misplaced
+# stickers and one hash for the transposition table.
+
+
+def _fixable_stickers(permutation):
+    # A rotation doesn't change the misplaced stickers, so a macro that rotates the cube and then moves some
+    # stickers can't fix more than the stickers it moves after rotating.
+    return max(1, min(len(affected_positions(compose(inverse(r), permutation))) for r in ORIENTATIONS))
+
+
+class EndgameSearch:
+
+    def __init__(self, macros: 'List[Macro]', max_depth=3, max_nodes=500_000, max_seconds=1.0):
+        self.macros = macros
+        self.permutations = np.stack([m.permutation for m in macros])
+        self.fixable = max(_fixable_stickers(m.permutation) for m in macros)
+        self.max_depth = max_depth
+        # the budget of a single search, nodes are cubes generated
+        self.max_nodes = max_nodes
+        self.max_seconds = max_seconds
+        self.nodes = 0
+        self.__deadline = 0.0
+        # hash -> most remaining depth the cube was searched with
+        self.__table = {}
+
+    # indexes into macros that solve the state, or None if there are none within the depth or the budget
+    def search(self, state):
+        self.nodes = 0
+        self.__deadline = time.perf_counter() + self.max_seconds
+        misplaced = int(calculate_fitness(state)[0])
+        if misplaced == 0:
+            return []
+
+        bound = self.__lower_bound(misplaced)
+        while bound <= self.max_depth:
+            self.__table.clear()
+            path = []
+            next_bound = self.__search(state, 0, bound, path)
+            if next_bound is None:
+                return path
+            if next_bound == np.inf or self.__out_of_budget():
+                return None
+            bound = next_bound
+        return None
+
+    def __lower_bound(self, misplaced):
+        return -(-misplaced // self.fixable)
+
+    def __out_of_budget(self):
+        return self.nodes >= self.max_nodes or time.perf_counter() >= self.__deadline
+
+    # returns None when it found a solution (in path), or else the smallest cost above the bound
+    def __search(self, state, depth, bound, path):
+        children = state[self.permutations]
+        misplaced = calculate_fitness(children)
+        self.nodes += len(children)
+
+        solved = np.flatnonzero(misplaced == 0)
+        if len(solved) > 0:
+            path.append(int(solved[0]))
+            return None
+
+        costs = depth + 1 + self.__lower_bound(misplaced)
+        next_bound = np.inf
+        if (costs > bound).any():
+            next_bound = int(costs[costs > bound].min())
+
+        remaining = bound - depth - 1
+        hashes = hash_states(children)
+        # the most promising children first
+        for i in np.lexsort((misplaced, costs)):
+            if costs[i] > bound:
+                break
+            if self.__table.get(hashes[i], -1) >= remaining:
+                continue
+            self.__table[hashes[i]] = remaining
+            if self.__out_of_budget():
+                return next_bound
+
+            path.append(int(i))
+            result = self.__search(children[i], depth + 1, bound, path)
+            if result is None:
+                return None
+            path.pop()
+            next_bound = min(next_bound, result)
+
+        return next_bound
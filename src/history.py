@@ -0,0 +1,99 @@
+import numpy as np
+
+# the empty history
+ROOT = -1
+
+
+class History:
+    # Append-only arena of (parent, macro) nodes shared by the whole population.
+    # The history of a cube is just the index of its last node, so cubes that were copied from
+    # the same parent share the prefix, and copying a history is copying an integer.
+    # Moves are only turned back into strings when a solution is reported.
+
+    def __init__(self, capacity=1 << 16):
+        self.parents = np.empty(capacity, dtype=np.int64)
+        self.macros = np.empty(capacity, dtype=np.int32)
+        # 0, 1, 2... used to number new nodes without allocating
+        self.__steps = np.arange(capacity, dtype=np.int64)
+        self.size = 0
+
+    @property
+    def capacity(self):
+        return len(self.parents)
+
+    def clear(self):
+        self.size = 0
+
+    def reserve(self, capacity):
+        if capacity > self.capacity:
+            self.parents = np.resize(self.parents, capacity)
+            self.macros = np.resize(self.macros, capacity)
+            self.__steps = np.arange(capacity, dtype=np.int64)
+
+    # replaces the whole arena, with the arrays of a saved one
+    def restore(self, parents, macros):
+        self.reserve(len(parents))
+        self.parents[:len(parents)] = parents
+        self.macros[:len(macros)] = macros
+        self.size = len(parents)
+
+    # adds one node per entry of nodes, returns the new nodes (out can be nodes itself)
+    def extend(self, nodes, macro_ids, out=None):
+        n = len(nodes)
+        if self.size + n > self.capacity:
+            self.reserve(max(self.size + n, 2 * self.capacity))
+
+        self.parents[self.size:self.size + n] = nodes
+        self.macros[self.size:self.size + n] = macro_ids
+        out = np.add(self.__steps[:n], self.size, out=out)
+        self.size += n
+        return out
+
+    # adds a whole history at once, returns its last node
+    def chain(self, macro_ids, node=ROOT):
+        n = len(macro_ids)
+        if n == 0:
+            return node
+        if self.size + n > self.capacity:
+            self.reserve(max(self.size + n, 2 * self.capacity))
+
+        self.parents[self.size] = node
+        self.parents[self.size + 1:self.size + n] = self.__steps[:n - 1] + self.size
+        self.macros[self.size:self.size + n] = macro_ids
+        self.size += n
+        return self.size - 1
+
+    # macro ids from the oldest to the newest
+    def unwind(self, node):
+        macro_ids = []
+        while node != ROOT:
+            macro_ids.append(int(self.macros[node]))
+            node = self.parents[node]
+        macro_ids.reverse()
+        return macro_ids
+
+    def length(self, node):
+        return len(self.unwind(node))
+
+    # Drops every node that can't be reached from nodes, returns nodes renumbered.
+    # The arena only keeps growing between resets, this keeps it proportional to the live histories.
+    def compact(self, nodes):
+        alive = np.zeros(self.size, dtype=bool)
+        frontier = np.unique(nodes[nodes != ROOT])
+        while len(frontier) > 0:
+            alive[frontier] = True
+            frontier = self.parents[frontier]
+            frontier = np.unique(frontier[frontier != ROOT])
+            frontier = frontier[~alive[frontier]]
+
+        # parents are always older than their children, so the order is kept
+        kept = np.flatnonzero(alive)
+        # one extra slot at the end, so that renumber[ROOT] is ROOT
+        renumber = np.full(self.size + 1, ROOT, dtype=np.int64)
+        renumber[kept] = np.arange(len(kept))
+
+        n = len(kept)
+        self.parents[:n] = renumber[self.parents[kept]]
+        self.macros[:n] = self.macros[kept]
+        self.size = n
+        return renumber[nodes]
@@ -0,0 +1,223 @@
+import os
+import time
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+from src.cube import SOLVED_STATE, STICKERS
+from src.metrics import ProgressPrinter
+from src.notation import compile_codes, parse, to_names
+from src.solver import Solver, SolveResult
+
+
+class SharedArrays:
+    # A few numpy arrays laid out in one block of shared memory, so every process sees the same data
+    # without pickling anything. Only the block name and the layout travel to the workers.
+
+    def __init__(self, layout, name=None):
+        # layout: list of (name, shape, dtype)
+        self.layout = layout
+        offsets = []
+        size = 0
+        for _, shape, dtype in layout:
+            # keep every array aligned to 8 bytes
+            size = (size + 7) // 8 * 8
+            offsets.append(size)
+            size += int(np.prod(shape)) * np.dtype(dtype).itemsize
+
+        if name is None:
+            self.memory = SharedMemory(create=True, size=max(size, 1))
+            self.memory.buf[:size] = bytes(size)
+        else:
+            self.memory = SharedMemory(name=name)
+
+        self.arrays = {}
+        for (key, shape, dtype), offset in zip(layout, offsets):
+            self.arrays[key] = np.ndarray(shape, dtype=dtype, buffer=self.memory.buf, offset=offset)
+
+    @property
+    def name(self):
+        return self.memory.name
+
+    def __getitem__(self, key):
+        return self.arrays[key]
+
+    def close(self):
+        self.arrays = {}
+        self.memory.close()
+
+    def unlink(self):
+        self.memory.unlink()
+
+
+def island_layout(islands, migrants, history_size):
+    return [
+        # 0 while nobody found a solution, otherwise island + 1
+        ("winner", (1,), np.int64),
+        # how many times each island published its elites
+        ("published", (islands,), np.int64),
+        ("states", (islands, migrants, STICKERS), np.uint8),
+        # histories as macro ids, padded
+        ("history_lengths", (islands, migrants), np.int64),
+        ("histories", (islands, migrants, history_size), np.int32),
+    ]
+
+
+class IslandSolver:
+    # Runs the worlds of a Solver in parallel, one island per process, each one with its own seed.
+    # The first island that finds a solution stops all the others.
+    # With a migration_interval, every that many generations each island publishes its best cubes
+    # and the next island in the ring takes them in place of some of its offspring.
+
+    def __init__(self, population_size, max_generations, max_resets, elitism_num, islands=None,
+                 migration_interval=0, migrants=5, seed=None, fitness="stickers"):
+        self.population_size = population_size
+        self.max_generations = max_generations
+        self.max_resets = max_resets
+        self.elitism_num = elitism_num
+        self.islands = min(islands or os.cpu_count(), max_resets)
+        self.migration_interval = migration_interval
+        self.migrants = min(migrants, population_size)
+        self.seed = seed
+        # a name, see solver.get_fitness_function, it is passed to the processes
+        self.fitness = fitness
+
+    # the scramble is text, a list of moves or an array of move codes, the islands get the codes
+    def solve(self, scramble, verbose=False):
+        start_time = time.time()
+        codes = parse(scramble)
+
+        if verbose:
+            print(f"Starting {self.islands} islands...")
+
+        # room for a migrant that already went through a whole world on another island,
+        # longer histories are not shared
+        layout = island_layout(self.islands, self.migrants, 2 * (self.max_generations + 2))
+        shared = SharedArrays(layout)
+        lock = mp.Lock()
+        seeds = np.random.SeedSequence(self.seed).spawn(self.islands)
+        result = SolveResult(to_names(codes))
+
+        try:
+            with ProcessPoolExecutor(self.islands, initializer=_init_worker, initargs=(lock,)) as pool:
+                futures = [pool.submit(_run_island, self.__solver_args(), codes, island, self.islands,
+                                       seeds[island], shared.name, layout,
+                                       self.migration_interval, self.migrants, verbose)
+                           for island in range(self.islands)]
+
+                for future in as_completed(futures):
+                    solution, worlds, generations = future.result()
+                    result.worlds += worlds
+                    result.generations += generations
+
+                    if solution is not None and not result.is_solved:
+                        # the island already raised the flag, this is in case it died before doing it
+                        shared["winner"][0] = solution[0] + 1
+                        for f in futures:
+                            f.cancel()
+                        result.solved(*solution[1:])
+        finally:
+            shared.close()
+            shared.unlink()
+
+        result.evaluations = result.generations * self.population_size
+        result.seconds = time.time() - start_time
+
+        if verbose:
+            print(str(result))
+            print("")
+
+        return result
+
+    def __solver_args(self):
+        return dict(population_size=self.population_size, max_generations=self.max_generations,
+                    max_resets=self.max_resets, elitism_num=self.elitism_num, fitness=self.fitness)
+
+
+_lock = None
+
+
+def _init_worker(lock):
+    global _lock
+    _lock = lock
+
+
+# island i runs worlds i, i + islands, i + 2 * islands... until one of the islands finds a solution
+def _run_island(solver_args, scramble, island, islands, seed, shared_name, layout, migration_interval,
+                migrants, verbose):
+    shared = SharedArrays(layout, shared_name)
+    winner = shared["winner"]
+
+    # the seeds come from the same SeedSequence, so the islands get independent streams
+    solver = Solver(**solver_args, seed=seed)
+    state = SOLVED_STATE[compile_codes(scramble)]
+    population = solver.create_population()
+    source = (island - 1) % islands
+    received = [0]
+
+    def on_generation(p, g):
+        generations[0] += 1
+        if winner[0] != 0:
+            return False
+
+        if migration_interval and islands > 1 and (g + 1) % migration_interval == 0:
+            _publish(shared, island, p, migrants)
+            received[0] = _receive(shared, source, p, migrants, received[0])
+
+        return True
+
+    listener = ProgressPrinter() if verbose else None
+    generations = [0]
+    worlds = 0
+
+    try:
+        for world in range(island, solver.max_resets, islands):
+            if winner[0] != 0:
+                break
+
+            solution = solver.evolve(population, state, world, on_generation, listener)
+            worlds += 1
+            if solution is not None:
+                winner[0] = island + 1
+                best, generation = solution
+                return (island, world, generation, solver.get_solution(population, best)), worlds, generations[0] + 1
+
+        return None, worlds, generations[0]
+    finally:
+        shared.close()
+
+
+def _publish(shared, island, population, migrants):
+    best = np.argsort(population.fitness, kind="stable")[:migrants]
+
+    with _lock:
+        for k, row in enumerate(best):
+            macro_ids = population.history.unwind(population.nodes[row])
+            if len(macro_ids) > shared["histories"].shape[2]:
+                shared["history_lengths"][island, k] = -1
+                continue
+
+            shared["states"][island, k] = population.states[row]
+            shared["history_lengths"][island, k] = len(macro_ids)
+            shared["histories"][island, k, :len(macro_ids)] = macro_ids
+        shared["published"][island] += 1
+
+
+# the migrants take the place of the last offspring, returns the last batch that was received
+def _receive(shared, source, population, migrants, last_received):
+    with _lock:
+        published = int(shared["published"][source])
+        if published == last_received:
+            return last_received
+
+        states = shared["states"][source].copy()
+        lengths = shared["history_lengths"][source].copy()
+        histories = shared["histories"][source].copy()
+
+    for k in range(migrants):
+        if lengths[k] >= 0:
+            population.replace(population.size - 1 - k, states[k], histories[k, :lengths[k]])
+
+    return published
@@ -0,0 +1,180 @@
+import argparse
+import os
+import time
+from typing import List
+
+import numpy as np
+
+from src.cube import MOVE_CODES, MOVE_NAMES, SOLVED_STATE, STICKERS, Macro, compile_moves, inverse
+from src.cubie import CO, CP, EO, EP, to_cubies
+from src.patterns import DIRECTORY, FACE_TURNS
+from src.simplify import invert, merge_moves
+from src.symmetry import canonical_hashes
+
+# A library of short algorithms that only move a few pieces: 3-cycles, pairs of swaps, twists and flips.
+# They are found by trying commutators [A, B] = A B A' B' of short sequences of face turns, which leave
+# most of the cube alone, and then conjugates S [A, B] S' to move the pieces they work on somewhere else.
+# Algorithms that do the same to a rotated cube are the same entry, the solver rotates the cube anyway,
+# and of each one only the shortest is kept.
+#
+# Build it once with:
+#   python -m src.library build
+# The file is an array of fixed size records, so the solver memory maps it and takes entries by index.
+
+# records are padded with this move code
+NO_MOVE = 255
+MAX_MOVES = 20
+
+LIBRARY_DTYPE = np.dtype([
+    # the algorithm compiled, a move table like the ones in MOVES
+    ("permutation", np.uint8, STICKERS),
+    ("moves", np.uint8, MAX_MOVES),
+    ("length", np.uint8),
+    # corners and edges the algorithm moves or twists
+    ("pieces", np.uint8),
+])
+
+PATH = os.path.join(DIRECTORY, "library.npy")
+
+
+def _sequences(length):
+    # face turns, without two turns of the same face in a row
+    sequences = [[m] for m in FACE_TURNS]
+    last = sequences
+    for _ in range(length - 1):
+        last = [s + [m] for s in last for m in FACE_TURNS if m[0] != s[-1][0]]
+        sequences += last
+    return sequences
+
+
+def _compose(*permutations):
+    # rows of permutations applied one after the other
+    result = permutations[0]
+    for p in permutations[1:]:
+        result = np.take_along_axis(result, p, axis=1)
+    return result
+
+
+def moved_pieces(permutations):
+    # how many corners and edges each permutation moves or twists
+    cubies = to_cubies(SOLVED_STATE[permutations])
+    corners = (cubies[..., CP] != np.arange(8)) | (cubies[..., CO] != 0)
+    edges = (cubies[..., EP] != np.arange(12)) | (cubies[..., EO] != 0)
+    return np.count_nonzero(corners, axis=-1) + np.count_nonzero(edges, axis=-1)
+
+
+def _commutators(a_length, b_length, max_pieces):
+    # every commutator [A, B] that moves max_pieces or less, in chunks to keep the memory down
+    a_sequences, b_sequences = _sequences(a_length), _sequences(b_length)
+    a = np.stack([compile_moves(s) for s in a_sequences])
+    b = np.stack([compile_moves(s) for s in b_sequences])
+    a_inverse, b_inverse = np.stack([inverse(p) for p in a]), np.stack([inverse(p) for p in b])
+
+    algorithms = []
+    pairs = np.arange(len(a) * len(b))
+    for chunk in np.array_split(pairs, max(1, len(pairs) >> 16)):
+        i, j = np.divmod(chunk, len(b))
+        pieces = moved_pieces(_compose(a[i], b[j], a_inverse[i], b_inverse[j]))
+        for k in np.flatnonzero((pieces > 0) & (pieces <= max_pieces)):
+            s, t = a_sequences[i[k]], b_sequences[j[k]]
+            algorithms.append(merge_moves(s + t + invert(s) + invert(t)))
+    return algorithms
+
+
+# shapes: longest A and longest B of the commutators [A, B] to try
+def generate(shapes=((3, 2), (4, 1)), setup_length=2, max_pieces=4, verbose=False):
+    start_time = time.time()
+    algorithms = []
+    for a_length, b_length in shapes:
+        algorithms += _commutators(a_length, b_length, max_pieces)
+    algorithms = _unique(algorithms)
+    commutators = len(algorithms)
+
+    # the conjugates move the same number of pieces
+    algorithms += [merge_moves(s + algorithm + invert(s)) for s in _sequences(setup_length) for algorithm in algorithms]
+    algorithms = _unique([algorithm for algorithm in algorithms if len(algorithm) <= MAX_MOVES])
+    if verbose:
+        print(f"{commutators} commutators and {len(algorithms) - commutators} conjugates "
+              f"({time.time() - start_time:.1f} s)")
+
+    library = np.zeros(len(algorithms), dtype=LIBRARY_DTYPE)
+    library["moves"] = NO_MOVE
+    for i, algorithm in enumerate(algorithms):
+        library["permutation"][i] = compile_moves(algorithm)
+        library["moves"][i, :len(algorithm)] = [MOVE_CODES[m] for m in algorithm]
+        library["length"][i] = len(algorithm)
+    library["pieces"] = moved_pieces(library["permutation"].astype(np.intp))
+    return library
+
+
+def _unique(algorithms):
+    # the shortest algorithm of each symmetry class, shortest first
+    algorithms = sorted(algorithms, key=len)
+    states = np.stack([SOLVED_STATE[compile_moves(algorithm)] for algorithm in algorithms])
+    _, first = np.unique(canonical_hashes(states, relabel=True), return_index=True)
+    return [algorithms[i] for i in sorted(first)]
+
+
+def save(library, path=PATH):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    np.save(path, library)
+
+
+def load(path=PATH):
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"No macro library {path}, build it with: python -m src.library build")
+    return np.load(path, mmap_mode="r")
+
+
+def get_moves(library, i):
+    return [MOVE_NAMES[code] for code in library["moves"][i, :library["length"][i]]]
+
+
+class LibraryMacros:
+    # The algorithms of a library, each one after each of a few prefixes (rotations), prefix by prefix.
+    # The permutations of all of them come straight from the records, and a Macro is only made when one
+    # is asked for, so a memory mapped library is not read into an object per algorithm.
+
+    def __init__(self, library, prefixes: 'List[Macro]'):
+        self.library = library
+        self.prefixes = prefixes
+
+    def __len__(self):
+        return len(self.prefixes) * len(self.library)
+
+    def __getitem__(self, i):
+        prefix, algorithm = divmod(int(i), len(self.library))
+        r = self.prefixes[prefix]
+        return Macro(r.moves + get_moves(self.library, algorithm),
+                     r.permutation[self.library["permutation"][algorithm]])
+
+    # the prefix and then the algorithm: prefix.permutation[algorithm.permutation]
+    @property
+    def permutations(self):
+        return np.concatenate([r.permutation[self.library["permutation"]] for r in self.prefixes])
+
+    @property
+    def lengths(self):
+        return np.concatenate([len(r) + self.library["length"].astype(np.int64) for r in self.prefixes])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Builds the library of algorithms that only move a few pieces.")
+    parser.add_argument("command", choices=["build"])
+    parser.add_argument("-o", "--output", default=PATH)
+    parser.add_argument("--shapes", default="3x2,4x1",
+                        help="longest A x longest B of the commutators [A, B] to try, separated by commas")
+    parser.add_argument("--setup-length", type=int, default=2, help="longest S in the conjugates S [A, B] S'")
+    parser.add_argument("--max-pieces", type=int, default=4)
+    args = parser.parse_args(argv)
+
+    shapes = [tuple(int(n) for n in shape.split("x")) for shape in args.shapes.split(",")]
+    library = generate(shapes, args.setup_length, args.max_pieces, verbose=True)
+    save(library, args.output)
+    counts = np.bincount(library["pieces"])
+    print(f"{args.output}: {len(library)} algorithms, by pieces moved: "
+          f"{', '.join(f'{n}: {c}' for n, c in enumerate(counts) if c)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+import numpy as np
+
+from src.cube import HASH_WEIGHTS, SOLVED_STATE, compile_moves, inverse
+from src.history import ROOT
+from src.simplify import invert
+from src.symmetry import ORIENTATION_MOVES, ORIENTATIONS, centered_states, centering_rotations
+
+# Meet in the middle: one population evolves from the scramble towards the solved cube and another one
+# from the solved cube towards the scramble. As soon as a cube of one of them is in a state a cube of the
+# other one went through, the moves of the first one and the moves of the second one undone solve it:
+#   scramble[forward] == solved[backward]  =>  scramble[forward][inverse(backward)] == solved
+# A state and its rotations are the same entry, the rotation between them goes in the middle.
+
+
+# Rotating a state is a gather, and instead the rows are compared with (or hashed with) the target (or the
+# weights) turned the other way: state[p] == target is state == target[inverse(p)]. That is a row of a small
+# table per rotation, taken with a plain index instead of a gather per sticker.
+def _inverse_rotated(values):
+    return np.stack([values[inverse(p)] for p in ORIENTATIONS])
+
+
+_KEY_WEIGHTS = _inverse_rotated(HASH_WEIGHTS)
+
+
+# the key of each row: the hash of the state rotated so that every center is on its face
+def state_keys(states):
+    weights = _KEY_WEIGHTS[centering_rotations(states)]
+    return np.einsum("ij,ij->i", states, weights, dtype=np.uint64)
+
+
+class DistanceTo:
+    # fitness of the backward population: the stickers that are not where they are in the scramble,
+    # after rotating both the same way the centers say
+
+    def __init__(self, state):
+        self.targets = _inverse_rotated(centered_states(state)[0])
+
+    def __call__(self, states):
+        return np.count_nonzero(states != self.targets[centering_rotations(states)], axis=1)
+
+
+class StateIndex:
+    # The states a population went through, key -> history node of the cube that got there first.
+    # It is a ring buffer of capacity entries, when it is full the oldest entries make room for the new ones.
+    # nodes is given to the population as kept_nodes, so that the history of an entry stays in the arena
+    # (and its node is renumbered) after the cube that reached it is gone.
+    # The keys are also kept sorted, with the slot of each one, so that a whole generation is added and
+    # looked up with a few searchsorted.
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.keys = np.zeros(capacity, dtype=np.uint64)
+        self.nodes = np.full(capacity, ROOT, dtype=np.int64)
+        self.size = 0
+        self.__next = 0
+        self.__sorted_keys = np.empty(0, dtype=np.uint64)
+        self.__sorted_slots = np.empty(0, dtype=np.intp)
+
+    def clear(self):
+        self.nodes[:] = ROOT
+        self.size = 0
+        self.__next = 0
+        self.__sorted_keys = np.empty(0, dtype=np.uint64)
+        self.__sorted_slots = np.empty(0, dtype=np.intp)
+
+    # positions of keys in the sorted keys, and which of them are there
+    def __search(self, keys):
+        positions = np.searchsorted(self.__sorted_keys, keys)
+        found = np.zeros(len(keys), dtype=bool)
+        inside = positions < self.size
+        found[inside] = self.__sorted_keys[positions[inside]] == keys[inside]
+        return positions, found
+
+    # a key that is already there keeps its first node, which has the shorter history
+    def add(self, keys, nodes):
+        keys, first = np.unique(keys, return_index=True)
+        nodes = nodes[first]
+        _, found = self.__search(keys)
+        keys, nodes = keys[~found][:self.capacity], nodes[~found][:self.capacity]
+        n = len(keys)
+        if n == 0:
+            return
+
+        slots = (self.__next + np.arange(n)) % self.capacity
+        evicted = slots[slots < self.size]
+        if len(evicted) > 0:
+            positions = np.searchsorted(self.__sorted_keys, self.keys[evicted])
+            self.__sorted_keys = np.delete(self.__sorted_keys, positions)
+            self.__sorted_slots = np.delete(self.__sorted_slots, positions)
+
+        self.keys[slots] = keys
+        self.nodes[slots] = nodes
+        positions = np.searchsorted(self.__sorted_keys, keys)
+        self.__sorted_keys = np.insert(self.__sorted_keys, positions, keys)
+        self.__sorted_slots = np.insert(self.__sorted_slots, positions, slots)
+        self.size = min(self.size + n, self.capacity)
+        self.__next = (self.__next + n) % self.capacity
+
+    # the first row of keys that is in the index and its node, or None
+    def find(self, keys):
+        positions, found = self.__search(keys)
+        rows = np.flatnonzero(found)
+        if len(rows) == 0:
+            return None
+        row = int(rows[0])
+        return row, int(self.nodes[self.__sorted_slots[positions[row]]])
+
+    def __len__(self):
+        return self.size
+
+
+# The solution of a meeting, from the moves of both sides: forward takes the scramble to a state that is
+# the state backward takes the solved cube to, rotated. None when the states are not the same after all
+# (two different states with the same key).
+def join(scramble_state, forward, backward):
+    forward_state = scramble_state[compile_moves(forward)]
+    backward_state = SOLVED_STATE[compile_moves(backward)]
+    same = np.flatnonzero((forward_state[ORIENTATIONS] == backward_state).all(axis=1))
+    if len(same) == 0:
+        return None
+    return forward + ORIENTATION_MOVES[same[0]] + invert(backward)
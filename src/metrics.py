@@ -0,0 +1,158 @@
+import time
+
+
+class GenerationStats:
+    # What happened in one generation. Timings are in seconds.
+
+    def __init__(self, world, generation, population, best, best_fitness, mean_fitness, moves_applied,
+                 fitness_time, sort_time, copy_time, mutate_time, duplicates, median_fitness=None):
+        self.world = world
+        self.generation = generation
+        # the best cube is population row best, its algorithm is only built if someone asks for it
+        self.population = population
+        self.best = best
+        self.best_fitness = best_fitness
+        self.mean_fitness = mean_fitness
+        self.median_fitness = median_fitness
+        self.moves_applied = moves_applied
+        self.fitness_time = fitness_time
+        self.sort_time = sort_time
+        self.copy_time = copy_time
+        self.mutate_time = mutate_time
+        # cubes that were in the same state as another one and got mutated again, part of the mutate time
+        self.duplicates = duplicates
+
+    @property
+    def seconds(self):
+        return self.fitness_time + self.sort_time + self.copy_time + self.mutate_time
+
+    def get_best_algorithm_str(self):
+        return self.population.get_algorithm_str(self.best)
+
+
+class SolverListener:
+    # Gets called by the solver while it runs. Without a listener the solver doesn't even measure time.
+
+    def on_start(self, scramble):
+        pass
+
+    def on_generation(self, stats: 'GenerationStats'):
+        pass
+
+    def on_reset(self, world):
+        pass
+
+    def on_finish(self, result):
+        pass
+
+
+class ProgressPrinter(SolverListener):
+    # what the solver prints when it runs with verbose=True
+
+    def __init__(self, every=20):
+        self.every = every
+
+    def on_start(self, scramble):
+        print("Starting...")
+
+    def on_generation(self, stats):
+        g = stats.generation
+        if g % self.every == 0 and g != 0:
+            print(f"World: {stats.world + 1} - Generation: {g}")
+            print(f"Best solution so far")
+            print(f"{stats.get_best_algorithm_str()}")
+            print("")
+
+    def on_reset(self, world):
+        print(f"Resetting the world")
+
+    def on_finish(self, result):
+        print(str(result))
+        print("")
+
+
+class Metrics(SolverListener):
+    # Collects the numbers of a whole solve: best and mean fitness per generation and where the time went.
+
+    def __init__(self):
+        self.best_fitness = []
+        self.mean_fitness = []
+        self.generations = 0
+        self.moves_applied = 0
+        self.fitness_time = 0.0
+        self.sort_time = 0.0
+        self.copy_time = 0.0
+        self.mutate_time = 0.0
+        self.evaluations = 0
+        self.duplicates = 0
+        self.start_time = None
+        self.seconds = 0.0
+
+    def on_start(self, scramble):
+        self.start_time = time.perf_counter()
+
+    def on_generation(self, stats):
+        self.best_fitness.append(stats.best_fitness)
+        self.mean_fitness.append(stats.mean_fitness)
+        self.generations += 1
+        self.moves_applied += stats.moves_applied
+        self.fitness_time += stats.fitness_time
+        self.sort_time += stats.sort_time
+        self.copy_time += stats.copy_time
+        self.mutate_time += stats.mutate_time
+        self.evaluations += stats.population.size
+        self.duplicates += stats.duplicates
+
+    def on_finish(self, result):
+        self.seconds = time.perf_counter() - self.start_time
+
+    @property
+    def generations_per_second(self):
+        return self.generations / self.seconds if self.seconds else 0.0
+
+    @property
+    def moves_per_second(self):
+        return self.moves_applied / self.seconds if self.seconds else 0.0
+
+    # fraction of the evaluated cubes that were copies of another one
+    @property
+    def duplicate_rate(self):
+        return self.duplicates / self.evaluations if self.evaluations else 0.0
+
+    def to_dict(self):
+        return {
+            "generations": self.generations,
+            "seconds": self.seconds,
+            "generations_per_second": self.generations_per_second,
+            "moves_applied": self.moves_applied,
+            "moves_per_second": self.moves_per_second,
+            "fitness_time": self.fitness_time,
+            "sort_time": self.sort_time,
+            "copy_time": self.copy_time,
+            "mutate_time": self.mutate_time,
+            "duplicates": self.duplicates,
+            "duplicate_rate": self.duplicate_rate,
+        }
+
+
+class Listeners(SolverListener):
+    # several listeners behind one
+
+    def __init__(self, *listeners):
+        self.listeners = listeners
+
+    def on_start(self, scramble):
+        for listener in self.listeners:
+            listener.on_start(scramble)
+
+    def on_generation(self, stats):
+        for listener in self.listeners:
+            listener.on_generation(stats)
+
+    def on_reset(self, world):
+        for listener in self.listeners:
+            listener.on_reset(world)
+
+    def on_finish(self, result):
+        for listener in self.listeners:
+            listener.on_finish(result)
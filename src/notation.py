@@ -0,0 +1,95 @@
+import re
+from functools import lru_cache
+
+import numpy as np
+
+from src.cube import MOVE_CODES, MOVE_NAMES, compile_codes
+from src.simplify import SUFFIXES, split_move
+
+# Turns move sequences written by people into move codes (see MOVE_CODES in src.cube) once, so that
+# nothing after that deals with strings, and turns codes back into text.
+# Besides the moves in MOVES it reads:
+#   - wide moves, Rw or r, as the face and the slice next to it: Rw -> R M'
+#   - layers counted from a face, like on bigger cubes (see src.nxn): 1R is R, 2R is the slice next to R
+#     (M'), 2Rw is Rw
+#   - 2' and '2 as 2, and the typographic prime R’
+#   - any whitespace between moves
+# Anything else is a ValueError that says which move it is and where.
+
+# wide move -> the moves it is made of, a quarter turn clockwise
+WIDE_MOVES = {
+    "Rw": ["R", "M'"], "Lw": ["L", "M"],
+    "Uw": ["U", "E'"], "Dw": ["D", "E"],
+    "Fw": ["F", "S"], "Bw": ["B", "S'"],
+}
+
+# the slice next to each face, turning like the face
+INNER_MOVES = {"2R": "M'", "2L": "M", "2U": "E'", "2D": "E", "2F": "S", "2B": "S'"}
+
+# layer of read_move -> the moves of the 3x3 cube it is made of, a quarter turn clockwise
+_LAYERS = {**{"2" + wide: moves for wide, moves in WIDE_MOVES.items()},
+           **{inner: [move] for inner, move in INNER_MOVES.items()}}
+
+_MOVE = re.compile(r"(?:(?P<count>[1-9][0-9]*)?(?P<face>[UDLRFB])(?P<wide>w)?|(?P<lower>[udlrfb])|(?P<other>[MESxyz]))"
+                   r"(?P<suffix>2'|'2|2|'|’)?")
+
+# suffix -> quarter turns clockwise
+SUFFIX_TURNS = {"": 1, "'": 3, "’": 3, "2": 2, "2'": 2, "'2": 2}
+
+
+@lru_cache(maxsize=None)
+def read_move(token):
+    # A single move -> the layer it turns, named like in src.nxn, and the quarter turns clockwise.
+    # None if it isn't one. r and Rw are 2Rw, 1R and 1Rw are R.
+    match = _MOVE.fullmatch(token)
+    if match is None:
+        return None
+    if match["lower"]:
+        layer = f"2{match['lower'].upper()}w"
+    elif match["other"]:
+        layer = match["other"]
+    else:
+        count = int(match["count"] or (2 if match["wide"] else 1))
+        layer = match["face"] if count == 1 else f"{count}{match['face']}{match['wide'] or ''}"
+    return layer, SUFFIX_TURNS[match["suffix"] or ""]
+
+
+@lru_cache(maxsize=None)
+def _codes(token):
+    # the codes of a single move, None if it isn't one or the 3x3 cube doesn't have that layer
+    move = read_move(token)
+    if move is None:
+        return None
+    layer, turns = move
+    if layer not in _LAYERS and layer not in MOVE_CODES:
+        return None
+
+    parts = [split_move(m) for m in _LAYERS.get(layer, [layer])]
+    return tuple(MOVE_CODES[part + SUFFIXES[k * turns % 4]] for part, k in parts)
+
+
+# A string of moves, a list of them or an array of codes -> uint8 array of codes.
+def parse(moves):
+    if isinstance(moves, np.ndarray):
+        if not np.issubdtype(moves.dtype, np.integer):
+            raise ValueError(f"Move codes are integers, not {moves.dtype}")
+        if moves.ndim != 1 or len(moves) > 0 and not (0 <= moves.min() and moves.max() < len(MOVE_NAMES)):
+            raise ValueError(f"Move codes go from 0 to {len(MOVE_NAMES) - 1}")
+        return moves.astype(np.uint8)
+
+    tokens = moves.split() if isinstance(moves, str) else moves
+    codes = []
+    for i, token in enumerate(tokens):
+        token_codes = _codes(token) if isinstance(token, str) else None
+        if token_codes is None:
+            raise ValueError(f"Unknown move {token!r} (move {i + 1} of {len(tokens)})")
+        codes.extend(token_codes)
+    return np.array(codes, dtype=np.uint8)
+
+
+def to_names(codes):
+    return [MOVE_NAMES[code] for code in codes]
+
+
+def format_moves(codes):
+    return " ".join(to_names(codes))
@@ -0,0 +1,185 @@
+from functools import lru_cache
+from typing import List
+
+import numpy as np
+
+from src.cube import BACK, BOTTOM, CLOCKWISE, COL, COUNTERCLOCKWISE, FACE_INDEX, FACES, FRONT, LEFT, RIGHT, ROW, TOP, \
+    Macro, compose, inverse
+from src.notation import read_move
+from src.simplify import SUFFIXES
+
+# Cubes of any size, with the same layout as src.cube: 6 faces of n * n stickers in FACES order, each face
+# row by row, one uint8 per sticker, and moves that are permutations of the sticker positions.
+# The move tables are built once per size by turning a cube whose stickers are their own positions,
+# so a population of 4x4 or 5x5 cubes evolves with the same whole-array gathers as the 3x3 one.
+#
+# Notation, for a cube of size n (read by src.notation.read_move):
+#   U D L R F B          the outer layers
+#   2R, 3R... nR         a single inner layer, counted from the face (2R is the one next to R)
+#   Rw or r, 3Rw...      that many layers from the face, Rw is two of them
+#   M E S                the middle layer, only when n is odd
+#   x y z                the whole cube
+# each one clockwise, with ' or 2 (or 2', '2) after it.
+
+# the face on the other side of each face
+_OPPOSITE = {TOP: BOTTOM, BOTTOM: TOP, LEFT: RIGHT, RIGHT: LEFT, FRONT: BACK, BACK: FRONT}
+
+_LETTERS = {"U": TOP, "D": BOTTOM, "L": LEFT, "R": RIGHT, "F": FRONT, "B": BACK}
+
+# the middle layer turns like this face
+_SLICES = {"M": "L", "E": "D", "S": "F"}
+
+# the whole cube turns like this face
+_ROTATIONS = {"x": "R", "y": "U", "z": "F"}
+
+
+def _strips(face, depth, n):
+    # The 4 strips of stickers that the layer at depth (0 is the face itself) moves when it turns
+    # like face, as (face, ROW or COL, index, flip): strip 1 goes into strip 2 and so on, flipped
+    # when the stickers change direction. These are the strips of src.cube with the 3 generalized.
+    last = n - 1
+    if face == "U":
+        return [(FRONT, ROW, depth, False), (LEFT, ROW, depth, False),
+                (BACK, ROW, depth, False), (RIGHT, ROW, depth, False)]
+    if face == "D":
+        row = last - depth
+        return [(FRONT, ROW, row, False), (RIGHT, ROW, row, False),
+                (BACK, ROW, row, False), (LEFT, ROW, row, False)]
+    if face == "L":
+        return [(BOTTOM, COL, depth, True), (BACK, COL, last - depth, True),
+                (TOP, COL, depth, False), (FRONT, COL, depth, False)]
+    if face == "R":
+        col = last - depth
+        return [(BOTTOM, COL, col, False), (FRONT, COL, col, False),
+                (TOP, COL, col, True), (BACK, COL, last - col, True)]
+    if face == "F":
+        return [(BOTTOM, ROW, depth, False), (LEFT, COL, last - depth, True),
+                (TOP, ROW, last - depth, False), (RIGHT, COL, depth, True)]
+    # B, with the depth counted from the front
+    k = last - depth
+    return [(BOTTOM, ROW, k, True), (RIGHT, COL, k, False),
+            (TOP, ROW, last - k, True), (LEFT, COL, last - k, False)]
+
+
+def _layer(face, depth, n):
+    # the permutation of turning the layer at depth clockwise, as seen from face
+    faces = np.arange(6 * n * n, dtype=np.intp).reshape(len(FACES), n, n)
+    if depth == 0:
+        i = FACE_INDEX[_LETTERS[face]]
+        faces[i] = np.rot90(faces[i], axes=CLOCKWISE)
+    if depth == n - 1:
+        # the face on the other side turns the other way, as seen from that side
+        i = FACE_INDEX[_OPPOSITE[_LETTERS[face]]]
+        faces[i] = np.rot90(faces[i], axes=COUNTERCLOCKWISE)
+
+    def strip(f, kind, index):
+        stickers = faces[FACE_INDEX[f]]
+        return stickers[index] if kind == ROW else stickers[:, index]
+
+    strips = _strips(face, depth, n)
+    values = []
+    for f, kind, index, flip in strips:
+        s = strip(f, kind, index).copy()
+        values.append(np.flip(s) if flip else s)
+    for k, (f, kind, index, _) in enumerate(strips):
+        strip(f, kind, index)[:] = values[k - 1]
+    return faces.reshape(-1)
+
+
+def _layers(face, depths, n):
+    permutation = np.arange(6 * n * n, dtype=np.intp)
+    for depth in depths:
+        permutation = compose(permutation, _layer(face, depth, n))
+    return permutation
+
+
+class CubeSize:
+    # Everything that depends on the size of the cube: the move tables, the solved state, the notation
+    # and the fitness. Get them with get_size(n), they are built once per size.
+
+    def __init__(self, n):
+        if n < 2:
+            raise ValueError("A cube has at least 2 layers")
+        self.n = n
+        self.stickers = 6 * n * n
+        self.solved_state = np.repeat(np.arange(len(FACES), dtype=np.uint8), n * n)
+        self.solved_state.flags.writeable = False
+
+        base = {}
+        for face in _LETTERS:
+            base[face] = _layer(face, 0, n)
+            for depth in range(1, n - 1):
+                base[f"{depth + 1}{face}"] = _layer(face, depth, n)
+            for count in range(2, n):
+                base[f"{count}{face}w"] = _layers(face, range(count), n)
+        if n % 2 == 1:
+            for slice_name, face in _SLICES.items():
+                base[slice_name] = _layer(face, n // 2, n)
+        for rotation, face in _ROTATIONS.items():
+            base[rotation] = _layers(face, range(n), n)
+
+        # notation -> permutation
+        self.moves = {}
+        for name, p in base.items():
+            self.moves[name] = p
+            self.moves[name + "'"] = inverse(p)
+            self.moves[name + "2"] = compose(p, p)
+        for p in self.moves.values():
+            p.flags.writeable = False
+
+        # The moves the solver starts from: the outer layers and the inner layers counted from U, R and F,
+        # the ones counted from the other side are the same layers
+        inner = [f"{depth + 1}{face}" for face in "URF" for depth in range(1, n - 1)]
+        self.single_moves = [name + suffix for name in list("UDRLFB") + inner for suffix in ["", "'", "2"]]
+
+        # For an odd size the center sticker of a face tells its color, like in the 3x3 cube.
+        # For an even size there is no fixed center, the color of a face is the one most of its
+        # center stickers have (all of the face for the 2x2, which has no centers).
+        inner_positions = [row * n + col for row in range(1, n - 1) for col in range(1, n - 1)]
+        self.center_positions = np.array(inner_positions or range(n * n), dtype=np.intp)
+
+    # "Rw 2U' x" or ["Rw", "2U'", "x"] -> the notations of the moves, checked against the tables
+    def split(self, moves):
+        tokens = moves.split() if isinstance(moves, str) else list(moves)
+        names = []
+        for i, token in enumerate(tokens):
+            move = read_move(token) if isinstance(token, str) else None
+            name = None if move is None else move[0] + SUFFIXES[move[1]]
+            if name not in self.moves:
+                raise ValueError(f"Unknown move {token!r} for a {self.n}x{self.n} cube "
+                                 f"(move {i + 1} of {len(tokens)})")
+            names.append(name)
+        return names
+
+    def compile_moves(self, moves: 'List'):
+        permutation = np.arange(self.stickers, dtype=np.intp)
+        for m in self.split(moves):
+            permutation = compose(permutation, self.moves[m])
+        permutation.flags.writeable = False
+        return permutation
+
+    def macro(self, moves: 'List'):
+        names = self.split(moves)
+        return Macro(names, self.compile_moves(names))
+
+    def scrambled_state(self, moves):
+        return self.solved_state[self.compile_moves(moves)]
+
+    def fitness(self, states):
+        # misplaced stickers of each row, compared with the color of the face
+        faces = np.asarray(states).reshape(-1, len(FACES), self.n * self.n)
+        if self.n % 2 == 1:
+            colors = faces[:, :, self.n * self.n // 2]
+        else:
+            centers = faces[:, :, self.center_positions]
+            counts = (centers[..., None] == np.arange(len(FACES), dtype=np.uint8)).sum(axis=2)
+            colors = counts.argmax(axis=2).astype(np.uint8)
+        return np.count_nonzero(faces != colors[..., None], axis=(1, 2))
+
+    def is_solved(self, state):
+        return self.fitness(state)[0] == 0
+
+
+@lru_cache(maxsize=None)
+def get_size(n) -> 'CubeSize':
+    return CubeSize(n)
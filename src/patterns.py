@@ -0,0 +1,198 @@
+import argparse
+import os
+import time
+from itertools import permutations
+from math import perm
+
+import numpy as np
+
+from src.cube import MOVES, calculate_fitness
+from src.cubie import CO, CP, CUBIE_MOVES, CUBIES, EO, EP, to_cubies
+from src.symmetry import centered_states
+
+# Pattern databases: the exact number of face turns needed to solve a subset of the pieces, for every
+# way those pieces can be placed and twisted. The distance to solve the whole cube is at least the
+# distance to solve any subset of it, which is a much better guide than the misplaced stickers.
+#
+# The tables are built once with a breadth first search and saved with two distances per byte:
+#   python -m src.patterns build
+# When solving they are memory mapped, so loading them costs nothing and every worker process
+# shares the same pages.
+
+# where the tables go unless told otherwise
+DIRECTORY = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tables")
+
+# the distances are in these moves, the ones a cube without slices and rotations can make
+FACE_TURNS = [m for m in MOVES if m[0] in "UDLRFB"]
+
+CORNER = "corner"
+EDGE = "edge"
+
+# how much a misplaced sticker counts in PatternFitness, compared to a move of distance
+STICKER_WEIGHT = 4
+
+# 4 bits per distance, none of the tables needs more than 12 moves
+UNVISITED = 15
+
+
+class PatternDatabase:
+    # Distances for the pieces (indexes of the corners or edges in src.cubie) of one kind.
+    # A pattern is where each piece is and how it is twisted, numbered as
+    #   rank of the positions among the k-permutations of the slots * orientations + orientation
+    # where the orientation of the pieces is a number in base 3 (corners) or 2 (edges).
+    # With all the pieces of a kind the orientation of the last one is implied, so it is left out.
+
+    def __init__(self, name, kind, pieces):
+        self.name = name
+        self.kind = kind
+        self.pieces = np.array(pieces, dtype=np.intp)
+        self.slots = 8 if kind == CORNER else 12
+        self.base = 3 if kind == CORNER else 2
+        self.digits = len(pieces) - 1 if len(pieces) == self.slots else len(pieces)
+        self.powers = self.base ** np.arange(self.digits - 1, -1, -1, dtype=np.int64)
+        self.orientations = self.base ** self.digits
+        self.size = perm(self.slots, len(pieces)) * self.orientations
+        self.table = None
+
+    def path(self, directory=DIRECTORY):
+        return os.path.join(directory, f"{self.name}.npy")
+
+    def load(self, directory=DIRECTORY):
+        path = self.path(directory)
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"No pattern database {path}, build it with: python -m src.patterns build")
+        self.table = np.load(path, mmap_mode="r")
+        return self
+
+    def save(self, directory=DIRECTORY):
+        os.makedirs(directory, exist_ok=True)
+        np.save(self.path(directory), self.table)
+
+    def index(self, cubies):
+        # one pattern per row of cubie states
+        cubies = np.asarray(cubies).reshape(-1, CUBIES)
+        permutation, orientation = (cubies[:, CP], cubies[:, CO]) if self.kind == CORNER else \
+            (cubies[:, EP], cubies[:, EO])
+
+        # the slot of each piece, with the orientation of the piece that is in it
+        slots = np.argsort(permutation, axis=1)[:, self.pieces]
+        twists = np.take_along_axis(orientation, slots[:, :self.digits], axis=1)
+        return _rank(slots, self.slots) * self.orientations + twists.astype(np.int64) @ self.powers
+
+    def distances(self, cubies):
+        return _unpack(self.table, self.index(cubies))
+
+    def build(self, verbose=False):
+        # breadth first from the solved pattern, one whole level at a time
+        arrangements = np.array(list(permutations(range(self.slots), len(self.pieces))), dtype=np.intp)
+        moves = [CUBIE_MOVES[m] for m in FACE_TURNS]
+        slot_moves, twist_moves = (CP, CO) if self.kind == CORNER else (EP, EO)
+
+        # the rank of the arrangement after each move, a move sends the piece in slot move[i] to slot i
+        arrangement_moves = np.empty((len(arrangements), len(moves)), dtype=np.int32)
+        for j, move in enumerate(moves):
+            destination = np.argsort(move[slot_moves])
+            arrangement_moves[:, j] = _rank(destination[arrangements], self.slots)
+        twists = [move[twist_moves].astype(np.intp) for move in moves]
+
+        depths = np.full(self.size, UNVISITED, dtype=np.uint8)
+        # in the solved cube each piece is in the slot with its own index
+        depths[_rank(self.pieces[None], self.slots) * self.orientations] = 0
+        depth = 0
+        while True:
+            start_time = time.time()
+            frontier = np.flatnonzero(depths == depth)
+            if len(frontier) == 0:
+                break
+            for chunk in np.array_split(frontier, max(1, len(frontier) >> 20)):
+                arrangement, orientation = np.divmod(chunk, self.orientations)
+                digits = orientation[:, None] // self.powers % self.base
+                for j in range(len(moves)):
+                    new_arrangement = arrangement_moves[arrangement, j]
+                    slots = arrangements[new_arrangement, :self.digits]
+                    new_digits = (digits + twists[j][slots]) % self.base
+                    patterns = new_arrangement * np.int64(self.orientations) + new_digits @ self.powers
+                    patterns = patterns[depths[patterns] == UNVISITED]
+                    depths[patterns] = depth + 1
+            if verbose:
+                print(f"{self.name}: {len(frontier)} patterns at depth {depth} ({time.time() - start_time:.1f} s)")
+            depth += 1
+
+        self.table = _pack(depths)
+        return self
+
+
+def _rank(arrangements, n):
+    # rank of each row among the k-permutations of range(n) in lexicographic order,
+    # the same order as itertools.permutations
+    arrangements = arrangements.astype(np.int64)
+    rank = np.zeros(len(arrangements), dtype=np.int64)
+    for t in range(arrangements.shape[1]):
+        smaller = np.count_nonzero(arrangements[:, :t] < arrangements[:, t:t + 1], axis=1)
+        rank = rank * (n - t) + arrangements[:, t] - smaller
+    return rank
+
+
+def _pack(depths):
+    if len(depths) % 2:
+        depths = np.append(depths, UNVISITED)
+    return depths[0::2] | (depths[1::2] << 4)
+
+
+def _unpack(table, i):
+    return (table[i >> 1] >> ((i & 1) << 2).astype(np.uint8)) & 15
+
+
+# name -> kind and pieces, the default set is the corners and the edges split in two halves
+DATABASES = {
+    "corners": (CORNER, range(8)),
+    "edges_a": (EDGE, range(6)),
+    "edges_b": (EDGE, range(6, 12)),
+    # small ones, they build in a moment
+    "corners_4": (CORNER, range(4)),
+    "edges_3": (EDGE, range(3)),
+}
+
+DEFAULT_DATABASES = ["corners", "edges_a", "edges_b"]
+
+
+def get_database(name):
+    kind, pieces = DATABASES[name]
+    return PatternDatabase(name, kind, list(pieces))
+
+
+class PatternFitness:
+    # The misplaced stickers and the number of face turns that the pattern databases say are needed
+    # at least (the largest of them), which is 0 only for a solved cube:
+    #   4 * misplaced stickers + distance
+    # The distance alone is a bad guide for the mutations, they are long algorithms that move a few
+    # stickers but change the distance a lot, so with it the solver stalls a few moves away.
+    # As part of the fitness it tells apart cubes with the same misplaced stickers.
+
+    def __init__(self, names=None, directory=DIRECTORY):
+        self.databases = [get_database(name).load(directory) for name in names or DEFAULT_DATABASES]
+
+    def distances(self, states):
+        cubies = to_cubies(centered_states(states))
+        return np.max([database.distances(cubies) for database in self.databases], axis=0)
+
+    def __call__(self, states):
+        return STICKER_WEIGHT * calculate_fitness(states) + self.distances(states)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Builds the pattern databases for the pattern fitness.")
+    parser.add_argument("command", choices=["build"])
+    parser.add_argument("names", nargs="*", default=DEFAULT_DATABASES, help=", ".join(DATABASES))
+    parser.add_argument("-d", "--directory", default=DIRECTORY)
+    args = parser.parse_args(argv)
+
+    for name in args.names:
+        start_time = time.time()
+        database = get_database(name).build(verbose=True)
+        database.save(args.directory)
+        print(f"{database.path(args.directory)}: {database.size} patterns, {time.time() - start_time:.1f} s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,177 @@
+import numpy as np
+from typing import List
+
+from src.cube import FACES, Macro, affected_table, count_misplaced, hash_states, hash_weights, macro_permutations
+from src.history import ROOT, History
+from src.symmetry import canonical_hashes
+
+
+class Population:
+    # The whole population lives in a single (size, 54) array, one cube per row, so that
+    # copying, mutating and evaluating a generation are whole-array numpy operations.
+    # Every array has a second buffer of the same size: a new generation is written into the
+    # back buffer and then the buffers are swapped, so evolving allocates nothing.
+
+    def __init__(self, size, macros: 'List[Macro]', incremental=False, fitness_function=None):
+        self.size = size
+        # the history stores indexes into macros, each cube points to its last node
+        self.macros = macros
+        self.permutations = macro_permutations(macros)
+        # 54 for the 3x3 cube, the moves of other sizes (see src.nxn) have more
+        self.stickers = self.permutations.shape[1]
+
+        # fitness_function(states) -> one fitness per row, without one the misplaced stickers of a cube
+        # with fixed centers (an odd size) are counted here
+        self.fitness_function = fitness_function
+
+        # incremental fitness: only the positions each macro affects are counted again.
+        # Rows are padded with a center, which always matches itself and adds nothing.
+        self.incremental = incremental and fitness_function is None
+        if self.incremental:
+            self.affected = affected_table(self.permutations)
+
+        self.states = np.empty((size, self.stickers), dtype=np.uint8)
+        self.history = History()
+        self.nodes = np.full(size, ROOT, dtype=np.int64)
+        # more nodes whose histories survive the compaction of the arena, renumbered in place
+        # (see src.meet.StateIndex)
+        self.kept_nodes = None
+        # the fitness is calculated once, when it is needed, not after every change
+        self.__fitness = np.zeros(size, dtype=np.int64)
+        self.__dirty = True
+
+        self.__back_states = np.empty_like(self.states)
+        self.__back_nodes = np.empty_like(self.nodes)
+        self.__back_fitness = np.empty_like(self.__fitness)
+
+        # scratch space: a mutation is a gather from the flat array of stickers,
+        # row i reads from i * stickers + permutation
+        self.__gather = np.empty((size, self.stickers), dtype=np.intp)
+        self.__row_offsets = (np.arange(size, dtype=np.intp) * self.stickers)[:, None]
+        self.__face_size = self.stickers // len(FACES)
+        self.__misplaced = np.empty((size, len(FACES), self.__face_size), dtype=bool)
+        self.__hash_weights = hash_weights(self.stickers)
+        self.__hashes = np.empty(size, dtype=np.uint64)
+
+    @property
+    def fitness(self):
+        if self.__dirty and self.fitness_function is not None:
+            self.__fitness[:] = self.fitness_function(self.states)
+            self.__dirty = False
+        elif self.__dirty:
+            faces = self.states.reshape(self.size, len(FACES), self.__face_size)
+            # centers are fixed in a Rubik cube
+            center = self.__face_size // 2
+            np.not_equal(faces, faces[:, :, center:center + 1], out=self.__misplaced)
+            self.__misplaced.sum(axis=(1, 2), out=self.__fitness)
+            self.__dirty = False
+        return self.__fitness
+
+    def reset(self, state):
+        self.states[:] = state
+        self.history.clear()
+        self.nodes[:] = ROOT
+        self.__dirty = True
+
+    # macro_ids has one entry per cube, starting at row start
+    def apply(self, macro_ids, start=0):
+        gather = self.__gather[start:]
+        np.take(self.permutations, macro_ids, axis=0, out=gather)
+        gather += self.__row_offsets[start:]
+
+        back = self.__back_states
+        back[:start] = self.states[:start]
+        np.take(self.states.reshape(-1), gather, out=back[start:])
+
+        if self.incremental and not self.__dirty:
+            affected = self.affected[macro_ids]
+            self.__fitness[start:] += count_misplaced(back[start:], affected) - \
+                count_misplaced(self.states[start:], affected)
+        else:
+            self.__dirty = True
+
+        self.states, self.__back_states = back, self.states
+
+        # before growing the arena, get rid of the histories that didn't survive the selection
+        if self.history.size + len(macro_ids) > self.history.capacity:
+            self.__compact()
+        self.history.extend(self.nodes[start:], macro_ids, out=self.nodes[start:])
+
+    # like apply, for a few rows that can be anywhere
+    def mutate(self, rows, macro_ids):
+        states = self.states[rows]
+        mutated = np.take_along_axis(states, self.permutations[macro_ids], axis=1)
+        if self.incremental and not self.__dirty:
+            affected = self.affected[macro_ids]
+            self.__fitness[rows] += count_misplaced(mutated, affected) - count_misplaced(states, affected)
+        else:
+            self.__dirty = True
+        self.states[rows] = mutated
+        self.nodes[rows] = self.history.extend(self.nodes[rows], macro_ids)
+
+    # adds a whole sequence of macros to row i
+    def append(self, i, macro_ids):
+        for macro_id in macro_ids:
+            self.states[i] = self.states[i][self.permutations[macro_id]]
+        self.nodes[i] = self.history.chain(macro_ids, self.nodes[i])
+        self.__dirty = True
+
+    def hashes(self):
+        return hash_states(self.states, out=self.__hashes, weights=self.__hash_weights)
+
+    # rows from start on with the same state as a row before them, so the first copy of each state is never
+    # included, and neither are the rows before start (the elites), which still count as earlier copies.
+    # With canonical=True a state and its 24 rotations are the same state.
+    def duplicates(self, canonical=True, start=0):
+        hashes = canonical_hashes(self.states) if canonical else self.hashes()
+        order = np.argsort(hashes, kind="stable")
+        sorted_hashes = hashes[order]
+        duplicates = order[1:][sorted_hashes[1:] == sorted_hashes[:-1]]
+        return duplicates[duplicates >= start]
+
+    # the next generation is made of copies of these rows
+    def select(self, rows):
+        np.take(self.states, rows, axis=0, out=self.__back_states)
+        np.take(self.nodes, rows, out=self.__back_nodes)
+        np.take(self.__fitness, rows, out=self.__back_fitness)
+
+        self.states, self.__back_states = self.__back_states, self.states
+        self.nodes, self.__back_nodes = self.__back_nodes, self.nodes
+        self.__fitness, self.__back_fitness = self.__back_fitness, self.__fitness
+
+    # puts a cube that comes from somewhere else in row i, the history is a list of macro ids
+    def replace(self, i, state, macro_ids):
+        self.states[i] = state
+        self.nodes[i] = self.history.chain(macro_ids)
+        self.__dirty = True
+
+    # the arrays that make up the population, to save it. The history only keeps what the rows point to.
+    def to_arrays(self):
+        self.__compact()
+        return {"states": self.states, "nodes": self.nodes,
+                "history_parents": self.history.parents[:self.history.size],
+                "history_macros": self.history.macros[:self.history.size]}
+
+    def restore(self, arrays):
+        self.states[:] = arrays["states"]
+        self.nodes[:] = arrays["nodes"]
+        self.history.restore(arrays["history_parents"], arrays["history_macros"])
+        self.__dirty = True
+
+    def __compact(self):
+        if self.kept_nodes is None:
+            self.nodes[:] = self.history.compact(self.nodes)
+        else:
+            nodes = self.history.compact(np.concatenate([self.nodes, self.kept_nodes]))
+            self.nodes[:] = nodes[:self.size]
+            self.kept_nodes[:] = nodes[self.size:]
+
+    # the moves of a history node, not necessarily the one of a row
+    def get_moves(self, node):
+        return [m for macro_id in self.history.unwind(node) for m in self.macros[macro_id].moves]
+
+    def get_algorithm(self, i):
+        return self.get_moves(self.nodes[i])
+
+    def get_algorithm_str(self, i):
+        return " ".join(self.get_algorithm(i))
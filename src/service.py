@@ -0,0 +1,276 @@
+import argparse
+import asyncio
+import json
+import os
+import socket
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from src.batch import init_worker, solve_scramble
+from src.cube import SOLVED_STATE
+from src.notation import compile_codes, format_moves, parse
+from src.simplify import invert, simplify
+from src.solver import FITNESS_FUNCTIONS
+from src.symmetry import ORIENTATION_MOVES, canonical_states
+
+# A long running solver: the workers are started once and stay warm, and every solution is kept in a cache
+# on disk, so a scramble that was solved before comes back at once. That includes the scrambles that end
+# in the same state rotated or with the colors swapped, they are solved by the same moves.
+#
+#   python -m src.service serve --socket /tmp/cube.sock
+#   python -m src.service solve --socket /tmp/cube.sock "R U R' U'"
+#
+# The protocol is one JSON object per line both ways, over a Unix socket or a localhost TCP port:
+#   {"scramble": "R U R' U'", "seed": 1, "id": 7}
+# and the answer is the same JSON as src.batch writes, with "cached" and the "id" of the request.
+# Requests on a connection are solved concurrently and answered in the order they finish.
+
+CACHE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tables", "solutions.db")
+
+
+class SolutionCache:
+    # Canonical state -> shortest known solution, in SQLite. When it holds more than max_entries,
+    # the ones that were used the longest time ago go first.
+    # A solution of the canonical state c = state[ORIENTATIONS[k]] solves state after the rotations
+    # ORIENTATION_MOVES[k], and the other way around with the rotations inverted.
+
+    def __init__(self, path=CACHE_PATH, max_entries=100_000):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.max_entries = max_entries
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("CREATE TABLE IF NOT EXISTS solutions "
+                                "(state BLOB PRIMARY KEY, solution TEXT, moves INTEGER, used REAL)")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS solutions_used ON solutions (used)")
+        self.connection.commit()
+
+    # the key of the state and the rotation that takes it to the canonical state
+    @staticmethod
+    def key(state):
+        canonical, rotations = canonical_states(state, relabel=True)
+        return canonical[0].tobytes(), int(rotations[0])
+
+    # the key of the state and a solution of it -> the solution of the canonical state
+    @staticmethod
+    def to_canonical(state, solution):
+        key, rotation = SolutionCache.key(state)
+        return key, simplify(invert(ORIENTATION_MOVES[rotation]) + list(solution), keep_rotation=False)
+
+    # a solution of the canonical state of state -> a solution of state
+    @staticmethod
+    def from_canonical(state, solution):
+        _, rotation = SolutionCache.key(state)
+        return simplify(ORIENTATION_MOVES[rotation] + list(solution), keep_rotation=False)
+
+    def get(self, state):
+        key, _ = self.key(state)
+        row = self.connection.execute("SELECT solution FROM solutions WHERE state = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        self.connection.execute("UPDATE solutions SET used = ? WHERE state = ?", (time.time(), key))
+        self.connection.commit()
+        return self.from_canonical(state, row[0].split())
+
+    def put(self, state, solution):
+        key, solution = self.to_canonical(state, solution)
+        self.connection.execute("INSERT INTO solutions VALUES (?, ?, ?, ?) ON CONFLICT (state) DO UPDATE SET "
+                                "solution = excluded.solution, moves = excluded.moves, used = excluded.used "
+                                "WHERE excluded.moves < solutions.moves",
+                                (key, " ".join(solution), len(solution), time.time()))
+        self.connection.execute("DELETE FROM solutions WHERE state IN (SELECT state FROM solutions "
+                                "ORDER BY used DESC LIMIT -1 OFFSET ?)", (self.max_entries,))
+        self.connection.commit()
+
+    def __len__(self):
+        return self.connection.execute("SELECT COUNT(*) FROM solutions").fetchone()[0]
+
+    def close(self):
+        self.connection.close()
+
+
+class SolveService:
+    # max_pending bounds the requests waiting for a worker, the ones above it are turned down at once
+    # so that the wait of the rest stays bounded
+
+    def __init__(self, solver_args, workers=None, fitness="stickers", cache: 'SolutionCache' = None,
+                 max_pending=1000):
+        self.workers = workers or os.cpu_count()
+        self.pool = ProcessPoolExecutor(self.workers, initializer=init_worker, initargs=(solver_args, fitness))
+        self.cache = SolutionCache() if cache is None else cache
+        self.max_pending = max_pending
+        self.pending = 0
+        # canonical state -> solve in progress, the same state is only solved once at a time
+        self.__solving = {}
+        self.__server = None
+
+    # starts the workers and waits until they are ready
+    async def warm_up(self):
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*[loop.run_in_executor(self.pool, time.sleep, 0.01) for _ in range(self.workers)])
+
+    async def solve(self, scramble_str, seed=None):
+        start_time = time.perf_counter()
+        try:
+            codes = parse(scramble_str)
+        except ValueError as e:
+            return {"scramble": scramble_str, "solved": False, "error": str(e)}
+
+        state = SOLVED_STATE[compile_codes(codes)]
+        key, _ = SolutionCache.key(state)
+        solving = self.__solving.get(key)
+        if solving is None:
+            solution = self.cache.get(state)
+            if solution is not None:
+                return self.__cached(scramble_str, codes, solution, start_time)
+            if self.pending >= self.max_pending:
+                return {"scramble": scramble_str, "solved": False, "error": "Too many pending scrambles"}
+
+            # counted before the solve starts, so that the requests that come in meanwhile see it
+            self.pending += 1
+            solving = asyncio.ensure_future(self.__solve(scramble_str, seed, state))
+            self.__solving[key] = solving
+            solving.add_done_callback(lambda _: self.__solved(key))
+            result, _ = await solving
+            return {**result, "cached": False}
+
+        # Somebody else is solving the same state, maybe rotated or with other colors. Their solution
+        # is taken through the canonical state, it doesn't solve this scramble as it is.
+        result, canonical = await solving
+        if canonical is None:
+            return {"scramble": scramble_str, "solved": False, "error": result.get("error", "No solution found"),
+                    "cached": False}
+        return self.__cached(scramble_str, codes, SolutionCache.from_canonical(state, canonical), start_time)
+
+    # the result of the scramble and the solution of its canonical state, None if it wasn't solved
+    async def __solve(self, scramble_str, seed, state):
+        result = await asyncio.get_running_loop().run_in_executor(self.pool, solve_scramble, 0, scramble_str, seed)
+        del result["line"]
+        if not result.get("solved"):
+            return result, None
+        self.cache.put(state, result["solution"].split())
+        return result, SolutionCache.to_canonical(state, result["solution"].split())[1]
+
+    def __solved(self, key):
+        self.pending -= 1
+        self.__solving.pop(key, None)
+
+    @staticmethod
+    def __cached(scramble_str, codes, solution, start_time):
+        return {"scramble": scramble_str, "normalized": format_moves(codes), "solved": True,
+                "solution": " ".join(solution), "moves": len(solution), "seconds": time.perf_counter() - start_time,
+                "cached": True}
+
+    async def __answer(self, line, writer, lock):
+        request = None
+        try:
+            request = json.loads(line)
+            response = await self.solve(request["scramble"], request.get("seed"))
+            if "id" in request:
+                response["id"] = request["id"]
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            response = {"solved": False, "error": f"Bad request: {e}"}
+        except (Exception, asyncio.CancelledError) as e:
+            # a worker that died or a solve that was cancelled, the client still gets an answer
+            response = {"solved": False, "error": f"Solve failed: {e!r}"}
+            if isinstance(request, dict) and "id" in request:
+                response["id"] = request["id"]
+
+        async with lock:
+            writer.write((json.dumps(response) + "\n").encode())
+            await writer.drain()
+
+    async def __handle(self, reader, writer):
+        lock = asyncio.Lock()
+        answers = set()
+        try:
+            while line := await reader.readline():
+                if line.strip():
+                    answer = asyncio.ensure_future(self.__answer(line, writer, lock))
+                    answers.add(answer)
+                    answer.add_done_callback(answers.discard)
+            await asyncio.gather(*answers)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    # a Unix socket at socket_path, or else a TCP port on host
+    async def start(self, socket_path=None, host="127.0.0.1", port=8765):
+        await self.warm_up()
+        if socket_path is not None:
+            self.__server = await asyncio.start_unix_server(self.__handle, path=socket_path)
+        else:
+            self.__server = await asyncio.start_server(self.__handle, host, port)
+        return self.__server
+
+    async def close(self):
+        if self.__server is not None:
+            self.__server.close()
+            await self.__server.wait_closed()
+        self.pool.shutdown()
+        self.cache.close()
+
+
+# sends scrambles to a running service and returns the answers in the order of the scrambles,
+# raises TimeoutError when the service doesn't answer for timeout seconds
+def request(scrambles, socket_path=None, host="127.0.0.1", port=8765, seed=None, timeout=600.0):
+    if socket_path is not None:
+        connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        connection.settimeout(timeout)
+        connection.connect(socket_path)
+    else:
+        connection = socket.create_connection((host, port), timeout=timeout)
+
+    with connection, connection.makefile("rw") as stream:
+        for i, scramble_str in enumerate(scrambles):
+            stream.write(json.dumps({"scramble": scramble_str, "seed": seed, "id": i}) + "\n")
+        stream.flush()
+        answers = [json.loads(stream.readline()) for _ in scrambles]
+    return sorted(answers, key=lambda answer: answer.get("id", -1))
+
+
+async def _serve(args):
+    solver_args = (args.population_size, args.max_generations, args.max_resets, args.elitism_num)
+    service = SolveService(solver_args, args.workers, args.fitness, SolutionCache(args.cache, args.cache_size),
+                           args.max_pending)
+    server = await service.start(args.socket, args.host, args.port)
+    print(f"Serving on {args.socket or f'{args.host}:{args.port}'} with {service.workers} workers")
+    try:
+        await server.serve_forever()
+    finally:
+        await service.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Solves scrambles as a local service, with a cache of solutions.")
+    parser.add_argument("command", choices=["serve", "solve"])
+    parser.add_argument("scrambles", nargs="*", help="for solve, each one quoted")
+    parser.add_argument("--socket", default=None, help="path of a Unix socket, instead of a TCP port")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("-w", "--workers", type=int, default=None)
+    parser.add_argument("--cache", default=CACHE_PATH)
+    parser.add_argument("--cache-size", type=int, default=100_000)
+    parser.add_argument("--max-pending", type=int, default=1000)
+    parser.add_argument("--timeout", type=float, default=600.0, help="for solve, seconds to wait for an answer")
+    parser.add_argument("--population-size", type=int, default=500)
+    parser.add_argument("--max-generations", type=int, default=300)
+    parser.add_argument("--max-resets", type=int, default=10)
+    parser.add_argument("--elitism-num", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--fitness", choices=FITNESS_FUNCTIONS, default="stickers")
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        try:
+            asyncio.run(_serve(args))
+        except KeyboardInterrupt:
+            pass
+    else:
+        for answer in request(args.scrambles, args.socket, args.host, args.port, args.seed, args.timeout):
+            print(json.dumps(answer))
+
+
+if __name__ == '__main__':
+    main()
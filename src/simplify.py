@@ -0,0 +1,138 @@
+from functools import lru_cache
+from typing import List
+
+import numpy as np
+
+from src.cube import MOVES, compile_moves, compose, identity, inverse
+from src.symmetry import ORIENTATION_MOVES, ORIENTATIONS, ROTATION_MOVES
+
+# Makes move sequences shorter without changing what they do to the cube:
+#   - moves on the same axis commute, so they are merged and cancelled: U D U' -> D, R R -> R2
+#   - whole cube rotations are pushed to the end by relabelling the face moves that come after them
+#   - optionally, slice moves are replaced by the two outer layers and a rotation: M -> L' R x'
+
+# layer -> axis, layers on the same axis commute
+AXES = {
+    "U": "y", "E": "y", "D": "y", "y": "y",
+    "L": "x", "M": "x", "R": "x", "x": "x",
+    "F": "z", "S": "z", "B": "z", "z": "z",
+}
+
+# the order used when a run of moves on the same axis is written back
+LAYER_ORDER = {layer: i for i, layer in enumerate("U E D y L M R x F S B z".split(" "))}
+
+SUFFIXES = {1: "", 2: "2", 3: "'"}
+TURNS = {"": 1, "2": 2, "'": 3}
+
+SLICES = ["M", "M'", "M2", "E", "E'", "E2", "S", "S'", "S2"]
+
+
+def split_move(move):
+    # "R'" -> ("R", 3), quarter turns clockwise
+    return move[0], TURNS[move[1:]]
+
+
+def is_rotation(move):
+    return move[0] in "xyz"
+
+
+@lru_cache(maxsize=None)
+def _notations():
+    # permutation -> notation, every move has a different permutation
+    return {p.tobytes(): m for m, p in MOVES.items()}
+
+
+@lru_cache(maxsize=None)
+def _orientations():
+    # permutation of each of the 24 orientations -> shortest sequence of rotations that reaches it
+    return {p.tobytes(): moves for p, moves in zip(ORIENTATIONS, ORIENTATION_MOVES)}
+
+
+@lru_cache(maxsize=None)
+def _slice_expansions():
+    # slice -> two outer layer moves and a rotation that do the same
+    outer = [m for m in MOVES if m[0] in "UDLRFB"]
+    targets = {MOVES[s].tobytes(): s for s in SLICES}
+    expansions = {}
+    for a in outer:
+        for b in outer:
+            if a[0] == b[0] or AXES[a[0]] != AXES[b[0]]:
+                continue
+            for r in ROTATION_MOVES:
+                s = targets.get(compile_moves([a, b, r]).tobytes())
+                if s is not None and s not in expansions:
+                    expansions[s] = [a, b, r]
+    return expansions
+
+
+def invert(moves: 'List'):
+    # the moves that undo moves
+    return [m if m.endswith("2") else (m[:-1] if m.endswith("'") else m + "'") for m in reversed(moves)]
+
+
+def push_rotations(moves: 'List', keep_rotation=True):
+    # R x U -> R F x: a rotation followed by a move is the same as the relabelled move and then the rotation
+    notations = _notations()
+    result = []
+    rotation = identity()
+
+    for m in moves:
+        if is_rotation(m):
+            rotation = compose(rotation, MOVES[m])
+        else:
+            relabelled = compose(compose(rotation, MOVES[m]), inverse(rotation))
+            result.append(notations[relabelled.tobytes()])
+
+    if keep_rotation:
+        result.extend(_orientations()[rotation.tobytes()])
+    return result
+
+
+def expand_slices(moves: 'List'):
+    expansions = _slice_expansions()
+    result = []
+    for m in moves:
+        result.extend(expansions.get(m, [m]))
+    return result
+
+
+def merge_moves(moves: 'List'):
+    # a stack of runs of moves on the same axis, each run is a dict layer -> quarter turns
+    runs = []
+
+    for m in moves:
+        layer, turns = split_move(m)
+        axis = AXES[layer]
+
+        if runs and runs[-1][0] == axis:
+            run = runs[-1][1]
+        else:
+            run = {}
+            runs.append((axis, run))
+
+        run[layer] = (run.get(layer, 0) + turns) % 4
+        if run[layer] == 0:
+            del run[layer]
+        # an empty run lets the runs before and after it merge
+        if not run:
+            runs.pop()
+
+    result = []
+    for _, run in runs:
+        for layer in sorted(run, key=LAYER_ORDER.get):
+            result.append(layer + SUFFIXES[run[layer]])
+    return result
+
+
+def same_effect(moves: 'List', other_moves: 'List'):
+    return np.array_equal(compile_moves(moves), compile_moves(other_moves))
+
+
+# keep_rotation=False drops the final rotation, the cube ends up solved anyway but maybe in another orientation
+def simplify(moves: 'List', rotations=True, slices=False, keep_rotation=True):
+    if slices:
+        moves = expand_slices(moves)
+    if rotations:
+        moves = push_rotations(moves, keep_rotation)
+
+    return merge_moves(moves)
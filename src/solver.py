@@ -1,8 +1,18 @@
-import random as rnd
-import cProfile
+import os
 import time
-import operator
-from src.cube import Cube
+from functools import lru_cache
+
+import numpy as np
+
+from src.checkpoint import Checkpointer, load as load_checkpoint, rng_state, set_rng_state
+from src.cube import CENTERS, SOLVED_STATE, STICKERS, Macro, Macros, hash_states, identity
+from src.endgame import EndgameSearch
+from src.notation import compile_codes, parse, to_names
+from src.nxn import get_size
+from src.meet import DistanceTo, StateIndex, join, state_keys
+from src.metrics import GenerationStats, Listeners, ProgressPrinter, SolverListener
+from src.population import Population
+from src.simplify import AXES, invert, same_effect, simplify
 
 SINGLE_MOVES = ["U", "U'", "U2", "D", "D'", "D2",
                 "R", "R'", "R2", "L", "L'", "L2",
@@ -46,119 +56,657 @@ PERMUTATIONS = [
 ]
 
 
+# Every mutation the solver can apply, compiled into a single permutation.
+# Index = evolution type, each one is a combination of rotations and permutations.
+# Other sizes of cube (see src.nxn) get the same permutations of their outer layers, without the ones
+# that need a middle slice when there is none.
+@lru_cache(maxsize=None)
+def compile_mutations(size=3):
+    macro = Macro if size == 3 else get_size(size).macro
+    permutations = [macro(p) for p in PERMUTATIONS if size % 2 == 1 or not any(m[0] in "MES" for m in p)]
+    full_rotations = [macro([r]) for r in FULL_ROTATIONS]
+    orientations = [macro([o]) for o in ORIENTATIONS]
+
+    mutations = (
+        # 0: permutation
+        tuple(permutations),
+        # 1: permutation + permutation
+        tuple(p1.then(p2) for p1 in permutations for p2 in permutations),
+        # 2: full rotation + permutation
+        tuple(r.then(p) for r in full_rotations for p in permutations),
+        # 3: orientation + permutation
+        tuple(o.then(p) for o in orientations for p in permutations),
+        # 4: full rotation + orientation + permutation
+        tuple(r.then(o).then(p) for r in full_rotations for o in orientations for p in permutations),
+        # 5: orientation + full rotation + permutation
+        tuple(o.then(r).then(p) for o in orientations for r in full_rotations for p in permutations),
+    )
+    if size == 3:
+        return mutations
+
+    # the permutations above never move the inner layers, these do
+    cube_size = get_size(size)
+    inner = [m for m in cube_size.single_moves if m[0].isdigit()]
+    outer = [m for m in cube_size.single_moves if not m[0].isdigit()]
+    # 6: single move
+    mutations += (tuple(cube_size.macro([m]) for m in cube_size.single_moves),)
+    if inner:
+        # 7: commutator of an inner layer and an outer one on another axis
+        mutations += (tuple(cube_size.macro([a, b] + invert([a, b]))
+                            for a in inner for b in outer if AXES[a[1]] != AXES[b[0]]),)
+    return mutations
+
+
+# The algorithms of a macro library (see src.library) as three more evolution types:
+#   library algorithm, full rotation + library algorithm, orientation + library algorithm
+# and for each of them the stickers of the cube before the mutation that each algorithm works on,
+# one row of 54 booleans per mutation.
+def compile_library_mutations(library):
+    from src.library import LibraryMacros
+
+    rotations = ([Macro([])], [Macro([r]) for r in FULL_ROTATIONS], [Macro([o]) for o in ORIENTATIONS])
+    moved = library["permutation"] != identity()
+
+    mutations, touched = [], []
+    for prefixes in rotations:
+        mutations.append(LibraryMacros(library, prefixes))
+        # the algorithm moves the stickers that the rotation brought to the positions it moves
+        rows = np.zeros((len(prefixes), len(library), STICKERS), dtype=bool)
+        for k, r in enumerate(prefixes):
+            rows[k][:, r.permutation] = moved
+        touched.append(rows.reshape(-1, STICKERS))
+    return tuple(mutations), touched
+
+
+FITNESS_FUNCTIONS = ["stickers", "pattern"]
+
+
+# A fitness function takes the states of a population and returns one integer per row, less is better
+# and 0 means solved. It can be a name from FITNESS_FUNCTIONS:
+#   stickers: the misplaced stickers, counted by the population itself
+#   pattern: the distance to solved from the pattern databases, see src.patterns
+def get_fitness_function(fitness):
+    if fitness == "stickers":
+        return None
+    if fitness == "pattern":
+        # the pattern databases (and the cubie modules they need) are only imported when they are used
+        from src.patterns import PatternFitness
+        return PatternFitness()
+    if callable(fitness):
+        return fitness
+    raise ValueError(f"Unknown fitness {fitness}, use one of {', '.join(FITNESS_FUNCTIONS)}")
+
+
 class Solver:
 
-    def __init__(self, population_size, max_generations, max_resets, elitism_num):
+    def __init__(self, population_size, max_generations, max_resets, elitism_num, incremental_fitness=False,
+                 seed=None, simplify_solution=True, deduplicate=True, canonical_duplicates=True, fitness="stickers",
+                 endgame_threshold=None, endgame_patience=15, endgame_nodes=100_000, endgame_seconds=1.0,
+                 endgame_depth=3, library=None, library_weighted=False, stagnation_limit=None, adaptive_mutations=False,
+                 adaptive_decay=0.9, adaptive_floor=0.2, checkpoint_path=None, checkpoint_interval=5.0, size=3,
+                 bidirectional=False, meet_index_size=100_000):
+        if size != 3 and (fitness == "pattern" or library is not None or endgame_threshold is not None or
+                          bidirectional):
+            raise ValueError("The pattern fitness, the macro library, the endgame and the bidirectional search "
+                             "are only for the 3x3 cube")
+        if bidirectional and checkpoint_path is not None:
+            raise ValueError("A bidirectional solve can't be checkpointed")
         self.population_size = population_size
         self.max_generations = max_generations
         self.max_resets = max_resets
         self.elitism_num = elitism_num
+        # every random choice comes from this generator, the same seed gives the same solution
+        self.rng = np.random.default_rng(seed)
+        # merge and cancel the moves of the solution and push its rotations to the end
+        self.simplify_solution = simplify_solution
+        # update the fitness from the stickers each mutation touches instead of counting all of them,
+        # it only pays off when the mutations are short
+        self.incremental_fitness = incremental_fitness
+        self.fitness_function = get_fitness_function(fitness)
+        # offspring that end up in the same state as another cube get mutated again,
+        # so that a generation doesn't waste evaluations on copies
+        self.deduplicate = deduplicate
+        # a cube that is another one rotated counts as a duplicate
+        self.canonical_duplicates = canonical_duplicates
+        self.mutations = compile_mutations(size)
+
+        # Cubes of other sizes count the misplaced stickers against the color of each face (see src.nxn).
+        # The canonical duplicates and the simplification are 3x3 only, like the options checked above.
+        self.size = size
+        self.cube_size = None
+        if size != 3:
+            self.cube_size = get_size(size)
+            if self.fitness_function is None:
+                self.fitness_function = self.cube_size.fitness
+            self.canonical_duplicates = False
+            self.simplify_solution = False
+        # a macro library (a path or the array itself) adds its algorithms as more evolution types,
+        # with library_weighted the algorithms that work on the stickers the elites still have misplaced
+        # are drawn more often
+        self.library_types = ()
+        self.library_touched = None
+        if library is not None:
+            if isinstance(library, str):
+                from src.library import load as load_library
+                library = load_library(library)
+            library_mutations, touched = compile_library_mutations(library)
+            self.library_types = tuple(range(len(self.mutations), len(self.mutations) + len(library_mutations)))
+            self.mutations += library_mutations
+            if library_weighted:
+                self.library_touched = [t.astype(np.float64) for t in touched]
 
-    def solve(self, scramble, verbose=False):
+        # the population refers to moves by index: first the single moves, then every mutation
+        # grouped by evolution type
+        if self.cube_size is None:
+            single_moves = [Macro([m]) for m in SINGLE_MOVES]
+        else:
+            single_moves = [self.cube_size.macro([m]) for m in self.cube_size.single_moves]
+        self.single_moves = len(single_moves)
+        self.macros = Macros([single_moves, *self.mutations])
+        counts = np.array([len(mutations) for mutations in self.mutations])
+        self.mutation_counts = counts
+        self.mutation_offsets = len(single_moves) + np.cumsum(counts) - counts
+        self.macro_lengths = self.macros.lengths
+
+        # a world ends early when neither the best nor the median fitness got better in the last
+        # stagnation_limit generations, and the next world starts (with max_generations of its own)
+        self.stagnation_limit = stagnation_limit
+        # pick the evolution types in proportion to how often their offspring recently came out better
+        # than their parents (a moving average with adaptive_decay), adaptive_floor of the picks stay
+        # uniform so that no type is ever ruled out
+        self.adaptive_mutations = adaptive_mutations
+        self.adaptive_decay = adaptive_decay
+        self.adaptive_floor = adaptive_floor
+        # generations the last world ran
+        self.generations = 0
+        # with a path, solve saves everything it needs to go on every checkpoint_interval seconds,
+        # at the start of a generation, and solve(resume=True) goes on from there
+        self.checkpoint_path = checkpoint_path
+        self.checkpoint_interval = checkpoint_interval
+        # a second population evolves from the solved cube towards the scramble, and the solve ends when
+        # the two meet (see src.meet). Each side remembers the states of its last meet_index_size cubes.
+        self.bidirectional = bidirectional
+        self.meet_indexes = (StateIndex(meet_index_size), StateIndex(meet_index_size)) if bidirectional else None
+
+        # when the best cube has this fitness or less and it didn't get better in the last endgame_patience
+        # generations, an exact search over the single moves and the mutations made of one permutation
+        # (and maybe a rotation) tries to finish it, with up to endgame_depth of them
+        self.endgame_threshold = endgame_threshold
+        self.endgame_patience = endgame_patience
+        self.endgame = None
+        if endgame_threshold is not None:
+            offsets = self.mutation_offsets
+            self.endgame_macro_ids = np.concatenate([np.arange(len(single_moves))] +
+                                                    [np.arange(offsets[t], offsets[t] + counts[t]) for t in (0, 2, 3)])
+            self.endgame = EndgameSearch([self.macros[i] for i in self.endgame_macro_ids],
+                                         max_depth=endgame_depth, max_nodes=endgame_nodes,
+                                         max_seconds=endgame_seconds)
+
+    # returns a SolveResult, verbose prints the progress like a ProgressPrinter listener would
+    # a seed starts a new random generator for this solve
+    # resume goes on from the checkpoint of a solve of the same scramble, if there is one
+    # the scramble is text, a list of moves or an array of move codes, see src.notation
+    # (or src.nxn for other sizes of cube, without the codes)
+    def solve(self, scramble, verbose=False, listener: 'SolverListener' = None, seed=None, resume=False):
         start_time = time.time()
+        if self.cube_size is None:
+            codes = parse(scramble)
+            scramble = to_names(codes)
+            state = SOLVED_STATE[compile_codes(codes)]
+        else:
+            scramble = self.cube_size.split(scramble)
+            state = self.cube_size.scrambled_state(scramble)
+
+        if seed is not None:
+            self.rng = np.random.default_rng(seed)
 
         if verbose:
-            print("Starting...")
+            listener = ProgressPrinter() if listener is None else Listeners(ProgressPrinter(), listener)
+        if listener is not None:
+            listener.on_start(scramble)
+
+        population = self.create_population()
+        backward_population = self.create_population(DistanceTo(state)) if self.bidirectional else None
+        result = SolveResult(scramble)
+
+        checkpointer, checkpoint = None, None
+        first_world, previous_seconds = 0, 0.0
+        if self.checkpoint_path is not None:
+            checkpointer = Checkpointer(self.checkpoint_path, self.checkpoint_interval)
+            if resume and os.path.exists(self.checkpoint_path):
+                checkpoint = load_checkpoint(self.checkpoint_path)
+                if str(checkpoint["scramble"]) != " ".join(scramble):
+                    raise ValueError(f"The checkpoint {self.checkpoint_path} is of another scramble")
+                first_world = int(checkpoint["world"])
+                result.worlds = int(checkpoint["worlds"])
+                result.generations = int(checkpoint["generations"])
+                previous_seconds = float(checkpoint["seconds"])
+
+        for r in range(first_world, self.max_resets):
+            if checkpointer is not None:
+                checkpointer.fields = dict(scramble=" ".join(scramble), worlds=result.worlds,
+                                           generations=result.generations,
+                                           seconds=lambda: previous_seconds + time.time() - start_time)
+            if self.bidirectional:
+                solution = self.meet(population, backward_population, state, r, listener=listener)
+            else:
+                solution = self.evolve(population, state, r, listener=listener, checkpointer=checkpointer,
+                                       checkpoint=checkpoint if r == first_world else None)
+                if solution is not None:
+                    solution = population.get_algorithm(solution[0]), solution[1]
+            result.worlds += 1
+
+            if solution is not None:
+                algorithm, g = solution
+                result.generations += g + 1
+                result.solved(r, g, self.simplified(algorithm))
+                break
+
+            result.generations += self.generations
+            if listener is not None:
+                listener.on_reset(r)
+
+        # both sides of a bidirectional solve evaluate a population every generation
+        result.evaluations = result.generations * self.population_size * (2 if self.bidirectional else 1)
+        result.seconds = previous_seconds + time.time() - start_time
+        if checkpointer is not None:
+            checkpointer.remove()
+
+        if listener is not None:
+            listener.on_finish(result)
+
+        return result
+
+    def get_solution(self, population, i):
+        return self.simplified(population.get_algorithm(i))
+
+    def simplified(self, algorithm):
+        if self.simplify_solution:
+            simplified = simplify(algorithm)
+            # it is cheap to make sure that the simplification didn't change anything
+            if same_effect(algorithm, simplified):
+                return simplified
+        return algorithm
+
+    # tries to solve row i with the endgame search, a cube is only searched once per world
+    def __finish(self, population, i, searched):
+        key = int(hash_states(population.states[i]))
+        if key in searched:
+            return False
+        searched.add(key)
+
+        path = self.endgame.search(population.states[i])
+        if path is None:
+            return False
+        population.append(i, self.endgame_macro_ids[path])
+        return True
+
+    # moves the success rates of the evolution types towards the share of their offspring that improved
+    def __adapt(self, choices, success_rates, improved):
+        types = len(success_rates)
+        tried = np.bincount(choices.evolution_types, minlength=types)
+        successes = np.bincount(choices.evolution_types[improved], minlength=types)
+        rates = np.divide(successes, tried, out=success_rates * 1.0, where=tried > 0)
+        success_rates *= self.adaptive_decay
+        success_rates += (1 - self.adaptive_decay) * rates
+
+        weights = np.full(types, self.adaptive_floor / types)
+        if success_rates.sum() > 0:
+            weights += (1 - self.adaptive_floor) * success_rates / success_rates.sum()
+        else:
+            weights += (1 - self.adaptive_floor) / types
+        choices.set_type_weights(weights)
+
+    # the chance of each library algorithm grows with how often the elites have misplaced the stickers it moves
+    def __weigh_library(self, choices, elite_states):
+        misplaced = np.mean(elite_states != elite_states[:, CENTERS], axis=0)
+        for evolution_type, touched in zip(self.library_types, self.library_touched):
+            # a bit for every algorithm, so that none of them is ruled out
+            choices.set_weights(evolution_type, touched @ misplaced + 1e-3)
+
+    # fitness_function replaces the one of the solver, like the DistanceTo of the backward side of a meet
+    def create_population(self, fitness_function=None):
+        fitness_function = self.fitness_function if fitness_function is None else fitness_function
+        return Population(self.population_size, self.macros, self.incremental_fitness, fitness_function)
+
+    # Runs one world from the scrambled state. Returns the row and the generation of the solution,
+    # or None if the world ran out of generations.
+    # on_generation(population, generation) is called at the end of each generation, it can change the
+    # population and returns False to give up on the world.
+    # The listener gets the stats of every generation, without one nothing is measured.
+    # With a checkpointer the world is saved now and then, a checkpoint (its arrays) continues a saved world.
+    def evolve(self, population, state, world, on_generation=None, listener: 'SolverListener' = None,
+               checkpointer: 'Checkpointer' = None, checkpoint=None):
+        generations = self.__generations(population, state, world, listener, checkpointer, checkpoint)
+        while True:
+            try:
+                g = next(generations)
+            except StopIteration as stop:
+                return stop.value
+            if on_generation is not None and on_generation(population, g) is False:
+                return None
+
+    # Runs one world from the scramble and from the solved cube at the same time, until a cube of one
+    # side gets to a state the other side went through (see src.meet). Returns the solution and the
+    # generation, or None if the world ran out of generations.
+    # backward_population comes from create_population(DistanceTo(state)).
+    def meet(self, population, backward_population, state, world, listener: 'SolverListener' = None):
+        forward_index, backward_index = self.meet_indexes
+        forward_index.clear()
+        backward_index.clear()
+        population.kept_nodes = forward_index.nodes
+        backward_population.kept_nodes = backward_index.nodes
+
+        forward = self.__generations(population, state, world, listener)
+        backward = self.__generations(backward_population, SOLVED_STATE, world, backward=True)
+        while True:
+            try:
+                g = next(forward)
+            except StopIteration as stop:
+                if stop.value is None:
+                    return None
+                best, g = stop.value
+                return population.get_algorithm(best), g
+            try:
+                next(backward)
+            except StopIteration as stop:
+                if stop.value is None:
+                    return None
+                # the backward cube is the scramble rotated
+                algorithm = join(state, [], backward_population.get_algorithm(stop.value[0]))
+                if algorithm is not None:
+                    return algorithm, g
+                return None
+
+            forward_keys = state_keys(population.states)
+            backward_keys = state_keys(backward_population.states)
+            backward_index.add(backward_keys, backward_population.nodes)
+            match = backward_index.find(forward_keys)
+            if match is not None:
+                row, node = match
+                algorithm = join(state, population.get_algorithm(row), backward_population.get_moves(node))
+                if algorithm is not None:
+                    return algorithm, g
+            forward_index.add(forward_keys, population.nodes)
+            match = forward_index.find(backward_keys)
+            if match is not None:
+                row, node = match
+                algorithm = join(state, population.get_moves(node), backward_population.get_algorithm(row))
+                if algorithm is not None:
+                    return algorithm, g
+
+    # The generations of a world, it yields the generation number at the end of each one and returns
+    # what evolve returns. backward is the population of a meet, which evolves from the solved cube
+    # towards the scramble: the endgame and the library weights, which aim at the solved cube, are left out.
+    def __generations(self, population, state, world, listener: 'SolverListener' = None,
+                      checkpointer: 'Checkpointer' = None, checkpoint=None, backward=False):
+        # elitism: the best performers move to the next generation without changes
+        elite_size = min(self.elitism_num + 1, self.population_size)
+        offspring = self.population_size - elite_size
+        selection = np.empty(self.population_size, dtype=np.intp)
+        choices = RandomChoices(self.rng, offspring, elite_size, self.mutation_counts, self.mutation_offsets)
+        listening = listener is not None
+        t0 = t1 = t2 = t3 = 0.0
+        progress = WorldProgress(len(self.mutation_counts), offspring)
 
-        for r in range(0, self.max_resets):
+        if checkpoint is None:
+            first_generation = 0
             # initialize population
-            cubes = []
-            for i in range(0, self.population_size):
-                cube = Cube()
-                cube.execute(scramble)
-                # randomize it
-                # cube.execute(self.__rnd_rotation())
-                cube.execute(self.__rnd_single_move())
-                cube.execute(self.__rnd_single_move())
-                cubes.append(cube)
-
-            # evolve population
-            for g in range(0, self.max_generations):
-                # sort by fitness
-                cubes.sort(key=operator.attrgetter('fitness'))
-
-                if verbose and g % 20 == 0 and g != 0:
-                    print(f"World: {r + 1} - Generation: {g}")
-                    print(f"Best solution so far")
-                    print(f"{cubes[0].get_algorithm_str()}")
-                    print("")
-
-                # the goal is to minimize the fitness function
-                # 0 means that the cube is solved
-                for i in range(0, len(cubes)):
-                    if cubes[i].fitness == 0:
-                        print("Solution found")
-                        print(f"World: {r + 1} - Generation: {g + 1}")
-                        print(f"Scramble: {cubes[i].get_scramble_str()}")
-                        print(f"Solution")
-                        print(f"{cubes[i].get_algorithm_str()}")
-                        print(f"Moves: {len(cubes[i].get_algorithm())}")
-                        print(f"{time.time() - start_time} seconds")
-                        print("")
-                        return
-
-                    # elitism: the best performers move to the next generation without changes
-                    if i > self.elitism_num:
-                        # copy a random top performer cube
-                        self.__copy(cubes[i], cubes[rnd.randint(0, self.elitism_num)])
-                        evolution_type = rnd.randint(0, 5)
-
-                        if evolution_type == 0:
-                            cubes[i].execute(self.__rnd_permutation())
-                        elif evolution_type == 1:
-                            cubes[i].execute(self.__rnd_permutation())
-                            cubes[i].execute(self.__rnd_permutation())
-                        elif evolution_type == 2:
-                            cubes[i].execute(self.__rnd_full_rotation())
-                            cubes[i].execute(self.__rnd_permutation())
-                        elif evolution_type == 3:
-                            cubes[i].execute(self.__rnd_orientation())
-                            cubes[i].execute(self.__rnd_permutation())
-                        elif evolution_type == 4:
-                            cubes[i].execute(self.__rnd_full_rotation())
-                            cubes[i].execute(self.__rnd_orientation())
-                            cubes[i].execute(self.__rnd_permutation())
-                        elif evolution_type == 5:
-                            cubes[i].execute(self.__rnd_orientation())
-                            cubes[i].execute(self.__rnd_full_rotation())
-                            cubes[i].execute(self.__rnd_permutation())
-
-            if verbose:
-                print(f"Resetting the world")
-
-        # if a solution was found we returned
-        print("")
-        print(f"Solution not found")
-        print(f"{time.time() - start_time} seconds")
-
-    # copy.deepcopy was very slow for the whole cube because it tries to figure out what changed
-    def __copy(self, cube_to, cube_from):
-        for f in cube_from.faces:
-            for i in range(0, 3):
-                for j in range(0, 3):
-                    cube_to.faces[f][i, j] = cube_from.faces[f][i, j]
-
-        cube_to.move_history = [item for item in cube_from.move_history]
-        cube_to.fitness = cube_from.fitness
-
-    def __rnd_single_move(self):
-        r = rnd.randint(0, len(SINGLE_MOVES) - 1)
-        return [SINGLE_MOVES[r]]
-
-    def __rnd_permutation(self):
-        r = rnd.randint(0, len(PERMUTATIONS) - 1)
-        return PERMUTATIONS[r]
-
-    def __rnd_full_rotation(self):
-        r = rnd.randint(0, len(FULL_ROTATIONS) - 1)
-        return [FULL_ROTATIONS[r]]
-
-    def __rnd_orientation(self):
-        r = rnd.randint(0, len(ORIENTATIONS) - 1)
-        return [ORIENTATIONS[r]]
+            population.reset(state)
+            # randomize it
+            for single_moves in self.rng.integers(0, self.single_moves, size=(2, self.population_size)):
+                population.apply(single_moves)
+        else:
+            first_generation = int(checkpoint["generation"])
+            population.restore(checkpoint)
+            progress.restore(checkpoint)
+            choices.evolution_types[:] = checkpoint["evolution_types"]
+            set_rng_state(self.rng, checkpoint["rng"])
+
+        # evolve population
+        for g in range(first_generation, self.max_generations):
+            self.generations = g + 1
+            if checkpointer is not None and checkpointer.due():
+                checkpointer.save(world=world, generation=g, rng=rng_state(self.rng),
+                                  evolution_types=choices.evolution_types, **population.to_arrays(),
+                                  **progress.to_arrays())
+            if listening:
+                t0 = time.perf_counter()
+
+            fitness = population.fitness
+            if listening:
+                t1 = time.perf_counter()
+
+            # sort by fitness
+            order = np.argsort(fitness, kind="stable")
+            if listening:
+                t2 = time.perf_counter()
+
+            # the goal is to minimize the fitness function
+            # 0 means that the cube is solved
+            best = order[0]
+            median = fitness[order[self.population_size // 2]]
+            progress.update(g, fitness[best], median)
+            if self.endgame is not None and not backward and 0 < fitness[best] <= self.endgame_threshold and \
+                    g - progress.improved >= self.endgame_patience and \
+                    self.__finish(population, best, progress.searched):
+                fitness = population.fitness
+            if fitness[best] == 0:
+                if listening:
+                    listener.on_generation(GenerationStats(world, g, population, best, 0, float(fitness.mean()), 0,
+                                                           t1 - t0, t2 - t1, 0.0, 0.0, 0, int(median)))
+                return best, g
+            if self.stagnation_limit is not None and g - progress.progressed >= self.stagnation_limit:
+                return None
+
+            if self.adaptive_mutations and g > 0:
+                self.__adapt(choices, progress.success_rates, fitness[elite_size:] < progress.parent_fitness)
+
+            if self.library_touched is not None and not backward:
+                self.__weigh_library(choices, population.states[order[:elite_size]])
+            choices.draw()
+
+            # the elites are kept and the rest are copies of random elites
+            elites = selection[:elite_size]
+            elites[:] = order[:elite_size]
+            np.take(elites, choices.parents, out=selection[elite_size:])
+            if self.adaptive_mutations:
+                np.take(fitness, selection[elite_size:], out=progress.parent_fitness)
+            population.select(selection)
+            if listening:
+                t3 = time.perf_counter()
+
+            mutations = choices.mutations
+            population.apply(mutations, start=elite_size)
+            moves_applied = int(self.macro_lengths[mutations].sum()) if listening else 0
+
+            # only once, a mutant that is still a duplicate stays in the population
+            duplicates = population.duplicates(self.canonical_duplicates, elite_size) if self.deduplicate else ()
+            if len(duplicates) > 0:
+                fresh_mutations = choices.redraw(duplicates)
+                population.mutate(duplicates, fresh_mutations)
+                if listening:
+                    moves_applied += int(self.macro_lengths[fresh_mutations].sum())
+
+            if listening:
+                # after the selection the best cube is the first row
+                listener.on_generation(GenerationStats(world, g, population, 0, int(fitness[best]),
+                                                       float(fitness.mean()), moves_applied,
+                                                       t1 - t0, t2 - t1, t3 - t2, time.perf_counter() - t3,
+                                                       len(duplicates), int(median)))
+
+            yield g
+
+        return None
+
+
+class WorldProgress:
+    # What a world keeps track of from one generation to the next, besides the population
+
+    def __init__(self, evolution_types, offspring):
+        # generation of the last improvement of the best fitness, and of the best or the median fitness
+        self.best_fitness = None
+        self.improved = 0
+        self.median_fitness = None
+        self.progressed = 0
+        # for the adaptive mutations
+        self.success_rates = np.full(evolution_types, 1 / evolution_types)
+        self.parent_fitness = np.zeros(offspring, dtype=np.int64)
+        # hashes of the cubes the endgame search already tried
+        self.searched = set()
+
+    def update(self, generation, best_fitness, median_fitness):
+        if self.best_fitness is None or best_fitness < self.best_fitness:
+            self.best_fitness, self.improved = best_fitness, generation
+        if self.median_fitness is None or median_fitness < self.median_fitness:
+            self.median_fitness, self.progressed = median_fitness, generation
+        self.progressed = max(self.progressed, self.improved)
+
+    def to_arrays(self):
+        # -1 is a fitness no cube has, it stands for None
+        return {"best_fitness": -1 if self.best_fitness is None else self.best_fitness, "improved": self.improved,
+                "median_fitness": -1 if self.median_fitness is None else self.median_fitness,
+                "progressed": self.progressed, "success_rates": self.success_rates,
+                "parent_fitness": self.parent_fitness, "searched": np.array(sorted(self.searched), dtype=np.uint64)}
+
+    def restore(self, arrays):
+        self.best_fitness = None if arrays["best_fitness"] < 0 else int(arrays["best_fitness"])
+        self.improved = int(arrays["improved"])
+        self.median_fitness = None if arrays["median_fitness"] < 0 else int(arrays["median_fitness"])
+        self.progressed = int(arrays["progressed"])
+        self.success_rates[:] = arrays["success_rates"]
+        self.parent_fitness[:] = arrays["parent_fitness"]
+        self.searched = {int(key) for key in arrays["searched"]}
+
+
+class RandomChoices:
+    # Every random choice of a generation, drawn from the generator with a single call
+    # into buffers that are reused from one generation to the next.
+
+    def __init__(self, rng, n, elite_size, mutation_counts, mutation_offsets):
+        self.rng = rng
+        self.elite_size = elite_size
+        self.mutation_counts = mutation_counts
+        self.mutation_offsets = mutation_offsets
+
+        self.uniform = np.empty((3, n))
+        # for each offspring: which elite is the parent, evolution type and the mutation (macro id)
+        self.parents = np.empty(n, dtype=np.intp)
+        self.evolution_types = np.empty(n, dtype=np.intp)
+        self.mutations = np.empty(n, dtype=np.intp)
+        self.__scratch = np.empty(n, dtype=np.intp)
+        # evolution type -> cumulative probabilities of its mutations, the rest are uniform
+        self.__cumulative = {}
+        # cumulative probabilities of the evolution types, None while they are uniform
+        self.__type_cumulative = None
+
+    def set_type_weights(self, weights):
+        cumulative = np.cumsum(weights)
+        self.__type_cumulative = cumulative / cumulative[-1]
+
+    def set_weights(self, evolution_type, weights):
+        cumulative = np.cumsum(weights)
+        self.__cumulative[evolution_type] = cumulative / cumulative[-1]
+
+    def draw(self):
+        u = self.rng.random(out=self.uniform)
+
+        u[0] *= self.elite_size
+        self.parents[:] = u[0]
+
+        # first the evolution type, then a mutation of that type
+        self.__draw_types(u[1], self.evolution_types)
+        np.take(self.mutation_counts, self.evolution_types, out=self.__scratch)
+        u[2] *= self.__scratch
+        self.mutations[:] = u[2]
+        np.take(self.mutation_offsets, self.evolution_types, out=self.__scratch)
+        self.mutations += self.__scratch
+        self.__weigh(self.evolution_types, u[2], self.mutations)
+
+    # mutations for a few more offspring rows (population rows, after the elites), chosen the same way,
+    # their evolution types are updated
+    def redraw(self, rows):
+        u = self.rng.random((2, len(rows)))
+        evolution_types = np.empty(len(rows), dtype=np.intp)
+        self.__draw_types(u[0], evolution_types)
+        u[1] *= self.mutation_counts[evolution_types]
+        mutations = u[1].astype(np.intp) + self.mutation_offsets[evolution_types]
+        self.__weigh(evolution_types, u[1], mutations)
+
+        self.evolution_types[rows - self.elite_size] = evolution_types
+        return mutations
+
+    def __draw_types(self, u, out):
+        if self.__type_cumulative is None:
+            u *= len(self.mutation_counts)
+            out[:] = u
+        else:
+            np.minimum(np.searchsorted(self.__type_cumulative, u, side="right"), len(self.mutation_counts) - 1,
+                       out=out)
+
+    # u is the uniform draw times the count of the type, the mutations of weighted types are drawn again from it
+    def __weigh(self, evolution_types, u, mutations):
+        for evolution_type, cumulative in self.__cumulative.items():
+            rows = np.flatnonzero(evolution_types == evolution_type)
+            if len(rows) > 0:
+                fractions = u[rows] / self.mutation_counts[evolution_type]
+                mutations[rows] = self.mutation_offsets[evolution_type] + \
+                    np.minimum(np.searchsorted(cumulative, fractions, side="right"), len(cumulative) - 1)
+
+
+class SolveResult:
+
+    def __init__(self, scramble):
+        self.scramble = scramble
+        self.is_solved = False
+        self.algorithm = []
+        # world and generation of the solution, starting at 1
+        self.world = None
+        self.generation = None
+        # counters for the whole solve
+        self.worlds = 0
+        self.generations = 0
+        self.evaluations = 0
+        self.seconds = 0.0
+
+    def solved(self, world, generation, algorithm):
+        self.is_solved = True
+        self.world = world + 1
+        self.generation = generation + 1
+        self.algorithm = algorithm
+
+    def get_algorithm_str(self):
+        return " ".join(self.algorithm)
+
+    def to_dict(self):
+        return {
+            "scramble": " ".join(self.scramble),
+            "solved": self.is_solved,
+            "solution": self.get_algorithm_str(),
+            "moves": len(self.algorithm),
+            "world": self.world,
+            "generation": self.generation,
+            "worlds": self.worlds,
+            "generations": self.generations,
+            "evaluations": self.evaluations,
+            "seconds": self.seconds,
+        }
+
+    def __str__(self):
+        if not self.is_solved:
+            return "\n".join(["", "Solution not found", f"{self.seconds} seconds"])
+
+        return "\n".join(["Solution found",
+                          f"World: {self.world} - Generation: {self.generation}",
+                          f"Scramble: {' '.join(self.scramble)}",
+                          "Solution",
+                          self.get_algorithm_str(),
+                          f"Moves: {len(self.algorithm)}",
+                          f"{self.seconds} seconds"])
 
 
 def main():
+    # import cProfile
     # p = cProfile.Profile()
     # p.enable()
 
@@ -167,7 +715,6 @@ def main():
     # scramble_str = "B' R' U2 B' F D2 R2 B F' L2 R' B2 D2 L2 F' U L B2 D F L' F R B2 D' U' B' L' B' F2"
     # scramble_str = "F2 D2 U L' R' B2 L2 R2 B F L D' L2 D U' L' D' B2 D2 R' U L R' D' U L' R2 U F' L'"
     scramble_str = "D' B2 D2 L2 U' L R' F L2 R2 U' L2 B' L D' B2 R2 B' R F U2 R B2 F' L' B2 L2 R F2 L'"
-    scramble = scramble_str.split(" ")
 
     population_size = 500
     max_generations = 300
@@ -176,8 +723,8 @@ def main():
 
     solver = Solver(population_size, max_generations, max_resets, elitism_num)
     # for _ in range(0, 5):
-    #     solver.solve(scramble, False)
-    solver.solve(scramble, verbose=True)
+    #     solver.solve(scramble_str, False)
+    solver.solve(scramble_str, verbose=True)
 
     # # Disable profiling
     # p.disable()
@@ -0,0 +1,118 @@
+import numpy as np
+
+from src.cube import (FACE_CENTERS, FACE_INDEX, FACES, FRONT, MOVES, SOLVED_STATE, STICKERS, TOP, compose, identity,
+                      inverse)
+
+# Rotating the whole cube doesn't change it, only the way we look at it, and the fitness doesn't change
+# either. Each state has 24 rotated variants, the canonical one is the variant with the smallest hash,
+# so the 24 of them end up being a single entry wherever states are compared or used as keys.
+# With relabel=True the colors are also renamed after rotating, so that the center of each face has
+# the color of that face in the solved state. That also merges states that are the same pattern
+# with the colors swapped.
+
+ROTATION_MOVES = ["x", "x'", "x2", "y", "y'", "y2", "z", "z'", "z2"]
+
+
+def _orientations():
+    # breadth first, so each orientation comes with the shortest sequence of rotations that reaches it
+    sequences = [[]]
+    permutations = [identity()]
+    seen = {identity().tobytes()}
+    frontier = [(identity(), [])]
+    while frontier:
+        next_frontier = []
+        for p, sequence in frontier:
+            for r in ROTATION_MOVES:
+                q = compose(p, MOVES[r])
+                if q.tobytes() not in seen:
+                    seen.add(q.tobytes())
+                    sequences.append(sequence + [r])
+                    permutations.append(q)
+                    next_frontier.append((q, sequence + [r]))
+        frontier = next_frontier
+
+    permutations = np.stack(permutations)
+    permutations.flags.writeable = False
+    return sequences, permutations
+
+
+# ORIENTATIONS[i] is the permutation of the rotations in ORIENTATION_MOVES[i], the first one is the identity
+ORIENTATION_MOVES, ORIENTATIONS = _orientations()
+
+# The hash of a state is two dot products done in float64, which is much faster than in integers.
+# The weights are below 2 ** 44 so that the sums stay exact (54 * 5 * 2 ** 44 < 2 ** 53).
+# Hashing state[p] is the same as hashing state with the weights permuted by inverse(p), so the
+# hashes of the 24 rotations are a single (n, 54) x (54, 48) product.
+_WEIGHTS = np.random.default_rng(0x5EED).integers(0, 1 << 44, size=(STICKERS, 2)).astype(np.float64)
+_ORIENTATION_WEIGHTS = np.concatenate([_WEIGHTS[inverse(p)] for p in ORIENTATIONS], axis=1)
+# odd, to mix the two dot products into one 64 bit hash
+_MIX = np.uint64(0x9E3779B97F4A7C15)
+
+
+def _hashes(states, weights):
+    sums = np.matmul(states.astype(np.float64), weights).astype(np.uint64)
+    sums = sums.reshape(sums.shape[:-1] + (sums.shape[-1] // 2, 2))
+    return sums[..., 0] * _MIX + sums[..., 1]
+
+
+def relabel_colors(states):
+    # renames the colors of each row so that the center of face i has color i
+    states = np.asarray(states).reshape(-1, STICKERS)
+    centers = states[:, FACE_CENTERS]
+    mapping = np.empty(centers.shape, dtype=states.dtype)
+    np.put_along_axis(mapping, centers.astype(np.intp), np.arange(len(FACES), dtype=states.dtype), axis=1)
+    return np.take_along_axis(mapping, states.astype(np.intp), axis=1)
+
+
+def rotated_states(states, relabel=False):
+    # (n, 24, 54), every rotation of every row
+    states = np.asarray(states).reshape(-1, STICKERS)
+    variants = states[:, ORIENTATIONS]
+    if relabel:
+        variants = relabel_colors(variants.reshape(-1, STICKERS)).reshape(variants.shape)
+    return variants
+
+
+def canonical_hashes(states, relabel=False):
+    # one hash per row, the same for the 24 rotations of a state
+    states = np.asarray(states).reshape(-1, STICKERS)
+    if relabel:
+        hashes = _hashes(rotated_states(states, relabel), _WEIGHTS)[..., 0]
+    else:
+        hashes = _hashes(states, _ORIENTATION_WEIGHTS)
+    return hashes.min(axis=1)
+
+
+def canonical_states(states, relabel=False):
+    # the canonical variant of each row and the index in ORIENTATIONS of the rotation that gives it,
+    # canonical_state = state[ORIENTATIONS[rotation]] (and then relabelled)
+    variants = rotated_states(states, relabel)
+    rotations = _hashes(variants, _WEIGHTS)[..., 0].argmin(axis=1)
+    return variants[np.arange(len(variants)), rotations], rotations
+
+
+def _centering_orientations():
+    # colors of the top and front centers -> index of the orientation that puts every center back on its face.
+    # state[p] is back in place when state = solved[inverse(p)].
+    orientations = np.zeros(len(FACES) ** 2, dtype=np.intp)
+    for i, p in enumerate(ORIENTATIONS):
+        centers = SOLVED_STATE[inverse(p)][FACE_CENTERS]
+        orientations[centers[FACE_INDEX[TOP]] * len(FACES) + centers[FACE_INDEX[FRONT]]] = i
+    return orientations
+
+
+_CENTERING_ORIENTATIONS = _centering_orientations()
+
+
+def centering_rotations(states):
+    # the index in ORIENTATIONS of the rotation that puts every center of each row back on its face
+    states = np.asarray(states).reshape(-1, STICKERS)
+    top = states[:, FACE_CENTERS[FACE_INDEX[TOP]]].astype(np.intp)
+    front = states[:, FACE_CENTERS[FACE_INDEX[FRONT]]]
+    return _CENTERING_ORIENTATIONS[top * len(FACES) + front]
+
+
+def centered_states(states):
+    # each row rotated so that the center of face i has color i, like before any slice move or rotation
+    states = np.asarray(states).reshape(-1, STICKERS)
+    return np.take_along_axis(states, ORIENTATIONS[centering_rotations(states)], axis=1)
@@ -0,0 +1,47 @@
+import io
+import json
+import unittest
+
+from src.batch import read_scrambles, solve_stream
+from src.cube import Cube
+from src.notation import parse, to_names
+
+
+class BatchTest(unittest.TestCase):
+    def test_read_scrambles(self):
+        lines = ["R U\n", "\n", "# a comment\n", "  F2 D  \n"]
+        self.assertEqual([(1, "R U"), (4, "F2 D")], list(read_scrambles(lines)))
+
+    def test_solve_stream(self):
+        scrambles = ["R U F'", "F2 Q", "L D2 B", "# not a scramble", "", "U' R2", "r  B L'2 D", "R"]
+        lines = io.StringIO("\n".join(scrambles) + "\n")
+        output = io.StringIO()
+        # more scrambles than can be in flight at once
+        solve_stream(lines, output, (100, 100, 5, 10), workers=2, in_flight_per_worker=1, seed=1)
+
+        records = [json.loads(line) for line in output.getvalue().splitlines()]
+        # one record per scramble, whatever the order they finished in
+        self.assertEqual([1, 2, 3, 6, 7, 8], sorted(record["line"] for record in records))
+        for record in records:
+            self.assertEqual(scrambles[record["line"] - 1], record["scramble"])
+            if record["line"] == 2:
+                self.assertFalse(record["solved"])
+                self.assertIn("Q", record["error"])
+                continue
+
+            self.assertTrue(record["solved"], record)
+            self.assertEqual(" ".join(to_names(parse(record["scramble"]))), record["normalized"])
+            cube = Cube()
+            cube.execute(record["normalized"].split())
+            cube.execute(record["solution"].split())
+            self.assertTrue(cube.is_solved())
+
+        # the same seed gives the same solutions
+        again = io.StringIO()
+        solve_stream(io.StringIO("\n".join(scrambles) + "\n"), again, (100, 100, 5, 10), workers=1, seed=1)
+        again = [json.loads(line) for line in again.getvalue().splitlines()]
+        self.assertEqual({r["line"]: r.get("solution") for r in records}, {r["line"]: r.get("solution") for r in again})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,8 @@
 import unittest
 
-from src.cube import Cube, FRONT, BACK, LEFT, RIGHT, TOP, BOTTOM
+import numpy as np
+
+from src.cube import Cube, Macro, MOVES, calculate_fitness, SOLVED_STATE, FRONT, BACK, LEFT, RIGHT, TOP, BOTTOM
 
 
 class CubeTest(unittest.TestCase):
@@ -110,6 +112,59 @@ class CubeTest(unittest.TestCase):
         self.assertEqual("B2 R'".split(" "), cube.get_algorithm())
         self.assertEqual("B2 R'", cube.get_algorithm_str())
 
+    def test_move_tables(self):
+        for notation, permutation in MOVES.items():
+            self.assertEqual(sorted(permutation), list(range(54)), notation)
+
+            state = SOLVED_STATE.copy()
+            for _ in range(4):
+                state = state[permutation]
+            self.assertTrue(np.array_equal(SOLVED_STATE, state), notation)
+
+        for notation in "U D R L F B M E S x y z".split(" "):
+            cube = Cube()
+            cube.execute([notation, notation + "'"])
+            self.assertTrue(np.array_equal(SOLVED_STATE, cube.state), notation)
+            cube.execute([notation, notation, notation + "2"])
+            self.assertTrue(np.array_equal(SOLVED_STATE, cube.state), notation)
+
+    def test_macro(self):
+        moves = "F' L' B' R' U' R U' B L F R U R' U".split(" ")
+        cube = Cube()
+        cube.execute(moves)
+
+        cube2 = Cube()
+        cube2.execute([])
+        cube2.apply(Macro(moves[:5]).then(Macro(moves[5:])))
+        self.assertTrue(np.array_equal(cube.state, cube2.state))
+        self.assertEqual(cube.fitness, cube2.fitness)
+        self.assertEqual(moves, cube2.get_algorithm())
+
+    def test_incremental_fitness(self):
+        cube = Cube()
+        for moves in ["R", "M", "x'", "F' L' B' R' U' R U' B L F R U R' U", "S2 y E'"]:
+            # the fitness is known before applying, so it is updated from the affected stickers
+            self.assertIsNotNone(cube.fitness)
+            cube.apply(Macro(moves.split(" ")))
+            self.assertEqual(int(calculate_fitness(cube.state)[0]), cube.fitness)
+
+    def test_from_state(self):
+        cube = Cube()
+        cube.execute("R U F'".split(" "))
+        copy = Cube.from_state(cube.state, cube.move_history)
+        self.assertTrue(np.array_equal(cube.state, copy.state))
+        self.assertEqual(cube.fitness, copy.fitness)
+
+        clone = cube.clone()
+        clone.execute(["F"])
+        self.assertEqual("R U F'", cube.get_scramble_str())
+        self.assertEqual(["F"], clone.get_algorithm())
+        self.assertEqual(cube.fitness, Cube.from_state(cube.state).fitness)
+
+        # every cube starts from the same solved state, which nobody can change
+        self.assertRaises(ValueError, np.put, Cube().state, 0, 1)
+        self.assertRaises(AttributeError, setattr, cube, "faces_cache", {})
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,59 @@
+import unittest
+
+import numpy as np
+
+from src.cube import MOVES, SOLVED_STATE, Cube, Macro, compile_moves
+from src.cubie import (CUBIE_MOVES, SOLVED_CUBIES, CubieCube, compile_cubie_moves, is_solvable, multiply,
+                       to_cubies, to_facelets)
+
+
+class CubieTest(unittest.TestCase):
+    def test_conversion(self):
+        self.assertTrue(np.array_equal(SOLVED_CUBIES, to_cubies(SOLVED_STATE)))
+        self.assertEqual(set(MOVES), set(CUBIE_MOVES))
+
+        rng = np.random.default_rng(0)
+        sequences = [list(rng.choice(list(MOVES), size=25)) for _ in range(50)]
+        states = np.stack([SOLVED_STATE[compile_moves(moves)] for moves in sequences])
+        cubies = np.stack([compile_cubie_moves(moves) for moves in sequences])
+
+        self.assertTrue(np.array_equal(cubies, to_cubies(states)))
+        self.assertTrue(np.array_equal(states, to_facelets(cubies)))
+        self.assertTrue(is_solvable(cubies).all())
+        self.assertTrue(np.array_equal(multiply(cubies, CUBIE_MOVES["R"]), to_cubies(states[:, MOVES["R"]])))
+
+    def test_solvable(self):
+        twisted = SOLVED_CUBIES.copy()
+        twisted[8] = 1
+        swapped = SOLVED_CUBIES.copy()
+        swapped[16:18] = [1, 0]
+        self.assertEqual([True, False, False], is_solvable(np.stack([SOLVED_CUBIES, twisted, swapped])).tolist())
+
+        # a single flipped edge shows two stickers that no edge has
+        flipped = SOLVED_STATE.copy()
+        flipped[[41, 28]] = flipped[[28, 41]]
+        self.assertFalse(is_solvable(to_cubies(flipped)))
+        flipped[41] = flipped[28]
+        with self.assertRaises(ValueError):
+            to_cubies(flipped)
+
+    def test_cube(self):
+        scramble = "R' U' L2 B2 U2 F L2 B' L' B D R B F2 L F R' B2 F' L B' D B2 R2 D' U B2 F' D R2".split(" ")
+        cube = Cube()
+        cube.execute(scramble)
+        cubie_cube = CubieCube()
+        cubie_cube.execute(scramble)
+
+        self.assertEqual(cube.fitness, cubie_cube.fitness)
+        self.assertEqual(str(cube), str(cubie_cube))
+        self.assertTrue(np.array_equal(cube.state, cubie_cube.to_cube().state))
+        self.assertTrue(np.array_equal(cubie_cube.state, CubieCube.from_cube(cube).state))
+
+        inverse = {m: n for m in MOVES for n in MOVES if np.array_equal(MOVES[m][MOVES[n]], np.arange(54))}
+        cubie_cube.apply(Macro([inverse[m] for m in reversed(scramble)]))
+        self.assertTrue(cubie_cube.is_solved())
+        self.assertTrue(np.array_equal(SOLVED_CUBIES, cubie_cube.state))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+import unittest
+
+from src.cube import SOLVED_STATE, Cube, Macro, calculate_fitness, compile_moves
+from src.endgame import EndgameSearch
+from src.solver import PERMUTATIONS, SINGLE_MOVES, Solver
+
+
+class EndgameTest(unittest.TestCase):
+    def setUp(self):
+        self.macros = [Macro([m]) for m in SINGLE_MOVES] + [Macro(p) for p in PERMUTATIONS]
+
+    def test_search(self):
+        search = EndgameSearch(self.macros)
+        self.assertEqual([], search.search(SOLVED_STATE))
+
+        # a permutation with a setup move
+        state = SOLVED_STATE[compile_moves(["R"] + PERMUTATIONS[3])]
+        path = search.search(state)
+        self.assertIsNotNone(path)
+        self.assertLessEqual(len(path), 3)
+        moves = [m for i in path for m in self.macros[i].moves]
+        self.assertEqual(0, calculate_fitness(state[compile_moves(moves)])[0])
+
+    def test_budget(self):
+        state = SOLVED_STATE[compile_moves("R U F' L2 D B' R2".split(" "))]
+        search = EndgameSearch(self.macros, max_nodes=1000)
+        self.assertIsNone(search.search(state))
+        self.assertLess(search.nodes, 1000 + len(self.macros))
+
+    def test_solver(self):
+        scramble = ["R"] + PERMUTATIONS[3]
+        self.assertFalse(Solver(50, 5, 1, 5, seed=0).solve(scramble).is_solved)
+        result = Solver(50, 5, 1, 5, seed=0, endgame_threshold=54, endgame_patience=0).solve(scramble)
+        self.assertTrue(result.is_solved)
+        # it takes the R and the permutation undone
+        self.assertFalse(Solver(50, 5, 1, 5, seed=0, endgame_threshold=54, endgame_patience=0,
+                                endgame_depth=1).solve(scramble).is_solved)
+
+        cube = Cube()
+        cube.execute(scramble)
+        cube.execute(result.algorithm)
+        self.assertTrue(cube.is_solved())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,43 @@
+import unittest
+
+import numpy as np
+
+from src.history import ROOT, History
+
+
+class HistoryTest(unittest.TestCase):
+    def test_shared_prefix(self):
+        history = History(capacity=2)
+        a, b = history.extend(np.array([ROOT, ROOT]), np.array([1, 2]))
+        c, d, e = history.extend(np.array([a, a, b]), np.array([3, 4, 5]))
+
+        self.assertEqual([], history.unwind(ROOT))
+        self.assertEqual([1, 3], history.unwind(c))
+        self.assertEqual([1, 4], history.unwind(d))
+        self.assertEqual([2, 5], history.unwind(e))
+        self.assertEqual(5, history.size)
+
+    def test_chain(self):
+        history = History(capacity=2)
+        a = history.chain([7, 8, 9])
+        b = history.chain([1], node=a)
+        self.assertEqual([7, 8, 9], history.unwind(a))
+        self.assertEqual([7, 8, 9, 1], history.unwind(b))
+        self.assertEqual(ROOT, history.chain([]))
+
+    def test_compact(self):
+        history = History()
+        nodes = np.array([ROOT, ROOT, ROOT])
+        for m in range(10):
+            nodes = history.extend(nodes[[0, 0, 1]], np.array([m, m + 100, m + 200]))
+        expected = [history.unwind(n) for n in nodes]
+
+        nodes = history.compact(np.append(nodes, ROOT))
+        self.assertEqual(ROOT, nodes[-1])
+        self.assertEqual(expected, [history.unwind(n) for n in nodes[:-1]])
+        # only the shared chain of the first cube plus the ends of the other two are left
+        self.assertEqual(10 + 1 + 2, history.size)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import multiprocessing as mp
+import os
+import unittest
+
+import numpy as np
+
+from src import islands
+from src.cube import SOLVED_STATE, Cube, compile_moves
+from src.islands import IslandSolver, SharedArrays, island_layout
+from src.solver import Solver
+
+
+def _segments():
+    return set(os.listdir("/dev/shm")) if os.path.isdir("/dev/shm") else set()
+
+
+class IslandSolverTest(unittest.TestCase):
+    def test_solve(self):
+        scramble = "R' U' L2 B2 U2 F L2 B' L' B D R B F2 L F R' B2 F' L B' D B2 R2 D' U B2 F' D R2"
+        before = _segments()
+        result = IslandSolver(200, 300, 4, 20, islands=2, migration_interval=2, seed=0).solve(scramble)
+        self.assertTrue(result.is_solved)
+        self.assertGreater(result.generations, 0)
+
+        cube = Cube()
+        cube.execute(scramble.split())
+        cube.execute(result.algorithm)
+        self.assertTrue(cube.is_solved())
+        self.assertEqual(before, _segments())
+
+    def test_not_solved(self):
+        scramble = "R' U' L2 B2 U2 F L2 B' L' B D R B F2 L F R' B2 F' L B' D B2 R2 D' U B2 F' D R2"
+        before = _segments()
+        result = IslandSolver(10, 2, 2, 2, islands=2, migration_interval=1, seed=0).solve(scramble)
+        self.assertFalse(result.is_solved)
+        self.assertEqual(2, result.worlds)
+        self.assertEqual(4, result.generations)
+        self.assertEqual(before, _segments())
+
+    def test_migration(self):
+        # island 0 publishes its best cubes and island 1 takes them in place of its last offspring
+        layout = island_layout(2, 3, 10)
+        shared = SharedArrays(layout)
+        try:
+            islands._init_worker(mp.Lock())
+            solver = Solver(8, 10, 1, 2, seed=0)
+            source, target = solver.create_population(), solver.create_population()
+            source.reset(SOLVED_STATE[compile_moves(["R"])])
+            source.apply(np.arange(8))
+            target.reset(SOLVED_STATE)
+
+            self.assertEqual(0, islands._receive(shared, 0, target, 3, 0))
+            islands._publish(shared, 0, source, 3)
+            self.assertEqual(1, islands._receive(shared, 0, target, 3, 0))
+            best = np.argsort(source.fitness, kind="stable")[:3]
+            for k, row in enumerate(best):
+                self.assertTrue(np.array_equal(source.states[row], target.states[7 - k]))
+                self.assertEqual(source.get_algorithm(row), target.get_algorithm(7 - k))
+            # nothing new to take
+            self.assertEqual(1, islands._receive(shared, 0, target, 3, 1))
+        finally:
+            shared.close()
+            shared.unlink()
+
+
+if __name__ == '__main__':
+    unittest.main()
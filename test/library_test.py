@@ -0,0 +1,61 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from src.cube import SOLVED_STATE, Cube, compile_moves, identity
+from src.library import generate, get_moves, load, moved_pieces, save
+from src.solver import Solver
+
+
+class LibraryTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.library = generate(shapes=((3, 1),), setup_length=1)
+
+    def test_generate(self):
+        self.assertGreater(len(self.library), 0)
+        for i in range(len(self.library)):
+            permutation = self.library["permutation"][i]
+            self.assertFalse((permutation == identity()).all())
+            self.assertTrue(0 < self.library["pieces"][i] <= 4)
+            # the moves are the permutation
+            self.assertTrue((compile_moves(get_moves(self.library, i)) == permutation).all())
+        self.assertTrue((moved_pieces(self.library["permutation"].astype(np.intp)) == self.library["pieces"]).all())
+
+    def test_save_load(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "library.npy")
+            self.assertRaises(FileNotFoundError, load, path)
+            save(self.library, path)
+            library = load(path)
+            self.assertIsInstance(library, np.memmap)
+            self.assertTrue((library == self.library).all())
+
+    def test_solver(self):
+        algorithm = get_moves(self.library, len(self.library) - 1)
+        scramble = ["R"] + algorithm
+        state = SOLVED_STATE[compile_moves(scramble)]
+        self.assertGreater(np.count_nonzero(state != SOLVED_STATE), 0)
+
+        for weighted in (False, True):
+            solver = Solver(50, 50, 3, 5, seed=0, library=self.library, library_weighted=weighted)
+            self.assertEqual(6 + 3, len(solver.mutations))
+            # the macros of the library are made from the records when they are asked for
+            for evolution_type in solver.library_types:
+                last = solver.mutation_offsets[evolution_type] + solver.mutation_counts[evolution_type] - 1
+                macro = solver.macros[last]
+                self.assertTrue(np.array_equal(compile_moves(macro.moves), solver.macros.permutations[last]))
+                self.assertEqual(len(macro), solver.macro_lengths[last])
+            result = solver.solve(scramble)
+            self.assertTrue(result.is_solved)
+
+            cube = Cube()
+            cube.execute(scramble)
+            cube.execute(result.algorithm)
+            self.assertTrue(cube.is_solved())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,126 @@
+import unittest
+
+import numpy as np
+
+from src.cube import SOLVED_STATE, Cube, compile_moves
+from src.history import ROOT
+from src.meet import DistanceTo, StateIndex, join, state_keys
+from src.population import Population
+from src.solver import Solver
+
+
+class StateIndexTest(unittest.TestCase):
+    def test_index(self):
+        index = StateIndex(3)
+        index.add(np.array([10, 11, 10], dtype=np.uint64), np.array([0, 1, 2]))
+        self.assertEqual(2, len(index))
+        # the first node of a key stays
+        self.assertEqual((1, 0), index.find(np.array([5, 10], dtype=np.uint64)))
+        self.assertIsNone(index.find(np.array([5], dtype=np.uint64)))
+
+        # the oldest entries make room
+        index.add(np.array([12, 13], dtype=np.uint64), np.array([3, 4]))
+        self.assertEqual(3, len(index))
+        self.assertIsNone(index.find(np.array([10], dtype=np.uint64)))
+        self.assertEqual((0, 4), index.find(np.array([13], dtype=np.uint64)))
+
+        index.clear()
+        self.assertEqual(0, len(index))
+        self.assertTrue((index.nodes == ROOT).all())
+
+    def test_random_batches(self):
+        # the same as a dict that forgets its oldest keys
+        rng = np.random.default_rng(0)
+        index, reference, order = StateIndex(50), {}, []
+        for _ in range(100):
+            keys = rng.integers(0, 80, size=rng.integers(0, 20)).astype(np.uint64)
+            for key in keys.tolist():
+                found = index.find(np.array([key], dtype=np.uint64))
+                self.assertEqual(reference.get(key), None if found is None else found[1])
+            nodes = rng.integers(0, 1000, size=len(keys))
+            index.add(keys, nodes)
+            new = {}
+            for key, node in zip(keys.tolist(), nodes.tolist()):
+                if key not in reference and key not in new:
+                    new[key] = node
+            for key in sorted(new):
+                if len(order) == 50:
+                    del reference[order.pop(0)]
+                reference[key] = new[key]
+                order.append(key)
+            self.assertEqual(len(reference), len(index))
+
+    def test_rotated_states(self):
+        states = np.stack([SOLVED_STATE[compile_moves(m.split())] for m in ["R U", "R U y", "R U x2 z", "R U'"]])
+        keys = state_keys(states)
+        self.assertEqual(keys[0], keys[1])
+        self.assertEqual(keys[0], keys[2])
+        self.assertNotEqual(keys[0], keys[3])
+        distances = DistanceTo(states[0])(states)
+        self.assertEqual([0, 0, 0], list(distances[:3]))
+        self.assertGreater(distances[3], 0)
+
+    def test_join(self):
+        scramble = SOLVED_STATE[compile_moves("R U F' L2 D".split())]
+        # the scramble undone halfway from each side, seen from another side
+        algorithm = join(scramble, ["D'", "L2"], ["R", "U", "F'", "y"])
+        self.assertIsNotNone(algorithm)
+        cube = Cube()
+        cube.execute("R U F' L2 D".split())
+        cube.execute(algorithm)
+        self.assertTrue(cube.is_solved())
+        self.assertIsNone(join(scramble, ["D'"], ["R", "U", "F'"]))
+
+    def test_kept_nodes(self):
+        solver = Solver(4, 10, 1, 1)
+        population = Population(4, solver.macros)
+        index = StateIndex(2)
+        population.kept_nodes = index.nodes
+        population.reset(SOLVED_STATE)
+        population.apply(np.array([6, 7, 8, 9]))
+        index.add(np.array([1], dtype=np.uint64), population.nodes[:1])
+        for _ in range(40000):
+            population.select(np.array([1, 1, 1, 1]))
+            population.apply(np.array([0, 1, 2, 3]))
+        # the indexed cube is gone and the arena was compacted, its history is still there
+        self.assertLess(population.history.size, 40000 * 2)
+        self.assertEqual([solver.macros[6].moves[0]], population.get_moves(index.nodes[0]))
+
+
+class BidirectionalSolverTest(unittest.TestCase):
+    def test_solve(self):
+        scramble = "R' U' L2 B2 U2 F L2 B' L' B D R B F2 L F R' B2 F' L B' D B2 R2 D' U B2 F' D R2"
+        for seed in range(3):
+            result = Solver(200, 100, 10, 20, seed=seed, bidirectional=True, meet_index_size=1000).solve(scramble)
+            self.assertTrue(result.is_solved)
+            self.assertEqual(2 * 200 * result.generations, result.evaluations)
+            cube = Cube()
+            cube.execute(scramble.split())
+            cube.execute(result.algorithm)
+            self.assertTrue(cube.is_solved())
+
+    def test_incremental_fitness(self):
+        # the backward side counts its own fitness, whatever the forward side does
+        solver = Solver(100, 10, 1, 10, incremental_fitness=True, deduplicate=False, bidirectional=True)
+        scramble = "R' U' L2 B2 U2 F L2 B' L' B D R B F2 L F R' B2 F' L B' D B2 R2 D' U B2 F' D R2"
+        state = SOLVED_STATE[compile_moves(scramble.split())]
+        distance = DistanceTo(state)
+        population, backward = solver.create_population(), solver.create_population(distance)
+        checked = []
+
+        def check(p, g):
+            checked.append(g)
+            self.assertTrue(np.array_equal(distance(backward.states), backward.fitness))
+
+        solver.evolve(backward, SOLVED_STATE, 0, on_generation=check)
+        self.assertEqual(10, len(checked))
+        solver.meet(population, backward, state, 0)
+        self.assertTrue(np.array_equal(distance(backward.states), backward.fitness))
+
+    def test_options(self):
+        self.assertRaises(ValueError, Solver, 10, 10, 1, 2, bidirectional=True, checkpoint_path="checkpoint.npz")
+        self.assertRaises(ValueError, Solver, 10, 10, 1, 2, bidirectional=True, size=4)
+
+
+if __name__ == '__main__':
+    unittest.main()
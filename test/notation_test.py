@@ -0,0 +1,70 @@
+import unittest
+
+import numpy as np
+
+from src.cube import MOVE_NAMES, MOVES, Cube, compile_moves
+from src.cubie import CubieCube
+from src.notation import WIDE_MOVES, compile_codes, format_moves, parse, read_move, to_names
+from src.nxn import get_size
+
+
+class NotationTest(unittest.TestCase):
+    def test_parse(self):
+        codes = parse("R  U2'\tF’ x'2\n M")
+        self.assertEqual(np.uint8, codes.dtype)
+        self.assertEqual(["R", "U2", "F'", "x2", "M"], to_names(codes))
+        self.assertEqual("R U2 F' x2 M", format_moves(codes))
+        self.assertTrue(np.array_equal(codes, parse(["R", "U2'", "F’", "x'2", "M"])))
+        self.assertTrue(np.array_equal(codes, parse(codes)))
+        self.assertEqual(0, len(parse("  ")))
+        # every notation of MOVES reads as itself
+        self.assertEqual(MOVE_NAMES, to_names(parse(" ".join(MOVES))))
+
+    def test_wide_moves(self):
+        # a wide move turns the face and the middle layer, which is the opposite face and a rotation
+        same = {"Rw": "L x", "Lw": "R x'", "Uw": "D y", "Dw": "U y'", "Fw": "B z", "Bw": "F z'"}
+        for wide, moves in same.items():
+            for suffix, turns in [("", 1), ("'", 3), ("2", 2)]:
+                expected = compile_moves(moves.split(" ") * turns)
+                self.assertTrue(np.array_equal(expected, compile_codes(parse(wide + suffix))), wide + suffix)
+                lower = wide[0].lower() + suffix
+                self.assertTrue(np.array_equal(expected, compile_codes(parse(lower))), lower)
+        self.assertEqual(len(WIDE_MOVES), 6)
+
+    def test_layers(self):
+        # layers counted from a face read the same as they do for bigger cubes
+        size = get_size(3)
+        for moves in ["1R 2R' 2Rw2 r", "2U 2D' 2F2 2B' 2L 1Fw'", "x 2Lw M'2"]:
+            self.assertTrue(np.array_equal(size.compile_moves(moves), compile_codes(parse(moves))), moves)
+        self.assertEqual(("2Rw", 3), read_move("Rw'"))
+        self.assertEqual(("3Fw", 2), read_move("3Fw2"))
+        self.assertIsNone(read_move("3r"))
+
+    def test_errors(self):
+        for bad in ["R Q", "R3", "Rw3", "X", "rw", "R''", "3Rw", "3R", "0R", "2M"]:
+            self.assertRaises(ValueError, parse, bad)
+        with self.assertRaisesRegex(ValueError, "'Q2' \\(move 2 of 3\\)"):
+            parse("R Q2 U")
+        self.assertRaises(ValueError, parse, np.array([0, 200]))
+        self.assertRaises(ValueError, parse, np.array(["R", "U"]))
+        self.assertRaises(ValueError, parse, np.array([1.7, 2.2]))
+
+    def test_execute_codes(self):
+        cube, other = Cube(), Cube()
+        cube.execute("R U F' L2".split(" "))
+        other.execute(parse("R U F' L2"))
+        self.assertTrue(np.array_equal(cube.state, other.state))
+        self.assertEqual(cube.get_scramble(), other.get_scramble())
+
+        cube.execute(["M", "y'", "R2"])
+        other.execute(parse("M y' R2"))
+        self.assertTrue(np.array_equal(cube.state, other.state))
+        self.assertEqual(cube.get_algorithm(), other.get_algorithm())
+
+        cubie_cube = CubieCube()
+        cubie_cube.execute(parse("R U F' L2 M y' R2"))
+        self.assertTrue(np.array_equal(cube.state, cubie_cube.facelets))
+
+
+if __name__ == '__main__':
+    unittest.main()
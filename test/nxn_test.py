@@ -0,0 +1,72 @@
+import unittest
+
+import numpy as np
+
+from src.cube import MOVES, compose, identity
+from src.nxn import get_size
+from src.solver import Solver
+
+
+class CubeSizeTest(unittest.TestCase):
+    def test_same_as_3x3(self):
+        size = get_size(3)
+        # plus the inner layer 2R and the wide 2Rw, which are M' and Rw
+        self.assertTrue(set(MOVES) <= set(size.moves))
+        self.assertTrue(np.array_equal(MOVES["M'"], size.moves["2R"]))
+        for name, permutation in MOVES.items():
+            self.assertTrue(np.array_equal(permutation, size.moves[name]), name)
+
+    def test_layers(self):
+        for n in range(2, 7):
+            size = get_size(n)
+            self.assertEqual(6 * n * n, size.stickers)
+            for name, permutation in size.moves.items():
+                self.assertEqual(sorted(permutation), list(range(size.stickers)), name)
+                if name[-1] not in "'2":
+                    # four turns are no turn
+                    p = compose(compose(permutation, permutation), compose(permutation, permutation))
+                    self.assertTrue(np.array_equal(np.arange(size.stickers), p), name)
+            # a rotation turns every layer, and a wide move the ones it says
+            layers = ["R"] + [f"{k}R" for k in range(2, n)] + ["L'"]
+            self.assertTrue(np.array_equal(size.compile_moves(layers), size.moves["x"]), n)
+            if n > 3:
+                self.assertTrue(np.array_equal(size.compile_moves("R 2R 3R"), size.moves["3Rw"]))
+        self.assertTrue(np.array_equal(identity(), get_size(3).compile_moves([])))
+
+    def test_split(self):
+        size = get_size(4)
+        self.assertEqual(["2Rw", "2Rw'", "2Rw2", "R", "2U'", "3Fw2", "x"], size.split("r Rw' Rw2' 1R 2U' 3Fw2 x"))
+        self.assertEqual(size.split("r"), size.split(["2Rw"]))
+        for bad in ["M", "4R", "5Rw", "2Q", "R3", "rw"]:
+            self.assertRaises(ValueError, size.split, bad)
+        with self.assertRaisesRegex(ValueError, "'M' for a 4x4 cube \\(move 2 of 2\\)"):
+            size.split("R M")
+        self.assertEqual(["M'"], get_size(5).split("M'"))
+
+    def test_fitness(self):
+        for n in (2, 4, 5):
+            size = get_size(n)
+            self.assertEqual(0, size.fitness(size.solved_state)[0])
+            # a rotated cube is solved, even without fixed centers
+            self.assertTrue(size.is_solved(size.scrambled_state("x y' z2")))
+            self.assertFalse(size.is_solved(size.scrambled_state("R")))
+        self.assertEqual(4 * 4, get_size(4).fitness(get_size(4).scrambled_state("2R"))[0] // 2)
+
+
+class NxNSolverTest(unittest.TestCase):
+    def test_solve(self):
+        for n, scramble in [(2, "R U F' R2 U'"), (4, "R 2R U"), (5, "R 3U")]:
+            size = get_size(n)
+            result = Solver(300, 200, 5, 30, seed=0, size=n).solve(scramble)
+            self.assertTrue(result.is_solved, n)
+            state = size.scrambled_state(scramble)[size.compile_moves(result.algorithm)]
+            self.assertTrue(size.is_solved(state), n)
+
+    def test_3x3_only(self):
+        self.assertRaises(ValueError, Solver, 10, 10, 1, 2, size=4, fitness="pattern")
+        self.assertRaises(ValueError, Solver, 10, 10, 1, 2, size=4, endgame_threshold=4)
+        self.assertRaises(ValueError, Solver(10, 10, 1, 2, size=4).solve, "R M")
+
+
+if __name__ == '__main__':
+    unittest.main()
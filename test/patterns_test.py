@@ -0,0 +1,62 @@
+import tempfile
+import unittest
+from itertools import permutations
+
+import numpy as np
+
+from src.cube import SOLVED_STATE, Cube, compile_moves
+from src.cubie import to_cubies
+from src.patterns import EDGE, FACE_TURNS, PatternDatabase, PatternFitness, _rank, get_database
+from src.solver import Solver
+
+
+class PatternsTest(unittest.TestCase):
+    def test_rank(self):
+        arrangements = np.array(list(permutations(range(7), 3)))
+        self.assertTrue(np.array_equal(np.arange(len(arrangements)), _rank(arrangements, 7)))
+
+    def test_build(self):
+        database = PatternDatabase("edges", EDGE, [5, 9, 11]).build()
+        self.assertEqual([0], database.distances(to_cubies(SOLVED_STATE)).tolist())
+
+        database = get_database("edges_3").build()
+        self.assertEqual([0], database.distances(to_cubies(SOLVED_STATE)).tolist())
+
+        # no distance is larger than the scramble that made it
+        rng = np.random.default_rng(0)
+        for length in range(6):
+            states = np.stack([SOLVED_STATE[compile_moves(rng.choice(FACE_TURNS, size=length))] for _ in range(50)])
+            distances = database.distances(to_cubies(states))
+            self.assertLessEqual(distances.max(), length)
+            if length == 1:
+                self.assertTrue((distances <= 1).all() and (distances == 1).any())
+
+    def test_fitness(self):
+        with tempfile.TemporaryDirectory() as directory:
+            for name in ["corners_4", "edges_3"]:
+                get_database(name).build().save(directory)
+            fitness = PatternFitness(["corners_4", "edges_3"], directory)
+
+            # rotations don't count, a slice is two face turns and these pieces need three of the four
+            cube = Cube()
+            cube.execute("x R U' y M".split(" "))
+            states = np.stack([SOLVED_STATE, cube.state, SOLVED_STATE[compile_moves(["x", "y"])]])
+            self.assertEqual([0, 3, 0], fitness.distances(states).tolist())
+            self.assertEqual([0, 4 * cube.fitness + 3, 0], fitness(states).tolist())
+
+            scramble = "R U F' L2 D".split(" ")
+            result = Solver(200, 100, 5, 20, seed=0, fitness=fitness).solve(scramble)
+            self.assertTrue(result.is_solved)
+            cube = Cube()
+            cube.execute(scramble)
+            cube.execute(result.algorithm)
+            self.assertTrue(cube.is_solved())
+
+        with self.assertRaises(FileNotFoundError):
+            PatternFitness(["corners_4"], directory)
+        with self.assertRaises(ValueError):
+            Solver(10, 1, 1, 1, fitness="unknown")
+
+
+if __name__ == '__main__':
+    unittest.main()
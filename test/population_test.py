@@ -0,0 +1,80 @@
+import unittest
+
+import numpy as np
+
+from src.cube import Cube, Macro, calculate_fitness
+from src.population import Population
+from src.solver import PERMUTATIONS
+
+
+class PopulationTest(unittest.TestCase):
+    def test_apply(self):
+        macros = [Macro(p) for p in PERMUTATIONS]
+        population = Population(len(macros), macros)
+        population.reset(Cube().state)
+        population.apply(np.arange(len(macros)))
+
+        for i, moves in enumerate(PERMUTATIONS):
+            cube = Cube()
+            cube.execute(moves)
+            self.assertTrue(np.array_equal(cube.state, population.states[i]))
+            self.assertEqual(cube.fitness, population.fitness[i])
+            self.assertEqual(moves, population.get_algorithm(i))
+
+    def test_select(self):
+        macros = [Macro(p) for p in PERMUTATIONS]
+        population = Population(4, macros)
+        population.reset(Cube().state)
+        population.apply(np.array([0, 1, 2, 3]))
+        population.select(np.array([2, 2, 0, 1]))
+        population.apply(np.array([4, 5]), start=2)
+
+        self.assertEqual(PERMUTATIONS[2], population.get_algorithm(0))
+        self.assertEqual(PERMUTATIONS[2], population.get_algorithm(1))
+        self.assertEqual(PERMUTATIONS[0] + PERMUTATIONS[4], population.get_algorithm(2))
+        self.assertEqual(PERMUTATIONS[1] + PERMUTATIONS[5], population.get_algorithm(3))
+
+        cube = Cube()
+        cube.execute(PERMUTATIONS[1] + PERMUTATIONS[5])
+        self.assertTrue(np.array_equal(cube.state, population.states[3]))
+
+    def test_incremental_fitness(self):
+        macros = [Macro(p) for p in PERMUTATIONS] + [Macro([m]) for m in "R M' x y2 S".split(" ")]
+        population = Population(len(macros), macros, incremental=True)
+        population.reset(Cube().state)
+        self.assertEqual(0, population.fitness.sum())
+
+        rng = np.random.default_rng(0)
+        for _ in range(10):
+            population.apply(rng.integers(0, len(macros), size=population.size))
+            population.apply(rng.integers(0, len(macros), size=population.size - 3), start=3)
+            self.assertTrue(np.array_equal(calculate_fitness(population.states), population.fitness))
+            # like the duplicates that get mutated again
+            rows = rng.choice(population.size, size=4, replace=False)
+            population.mutate(rows, rng.integers(0, len(macros), size=len(rows)))
+            self.assertTrue(np.array_equal(calculate_fitness(population.states), population.fitness))
+
+    def test_duplicates(self):
+        macros = [Macro(p) for p in PERMUTATIONS] + [Macro(["R"]), Macro(["R'"]), Macro(["R2"])]
+        r, r_prime, r2 = len(macros) - 3, len(macros) - 2, len(macros) - 1
+        population = Population(6, macros)
+        population.reset(Cube().state)
+        population.apply(np.array([0, 0, 1, r, 1, r_prime]))
+        # R' R2 is the same as R, like row 3
+        population.mutate(np.array([5]), np.array([r2]))
+
+        self.assertEqual([1, 4, 5], sorted(population.duplicates().tolist()))
+        # the first rows are left alone, but still count as the first copy
+        self.assertEqual([4, 5], sorted(population.duplicates(start=2).tolist()))
+        self.assertEqual(["R'", "R2"], population.get_algorithm(5))
+        self.assertEqual(population.hashes()[3], population.hashes()[5])
+        self.assertNotEqual(population.hashes()[0], population.hashes()[2])
+
+        population.mutate(np.array([1, 4]), np.array([3, 4]))
+        self.assertEqual([5], population.duplicates().tolist())
+        self.assertTrue(np.array_equal(calculate_fitness(population.states), population.fitness))
+        self.assertEqual(PERMUTATIONS[0] + PERMUTATIONS[3], population.get_algorithm(1))
+
+
+if __name__ == '__main__':
+    unittest.main()
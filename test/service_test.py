@@ -0,0 +1,130 @@
+import asyncio
+import os
+import tempfile
+import unittest
+
+from src.cube import SOLVED_STATE, Cube, compile_moves
+from src.service import SolutionCache, SolveService, request
+
+
+def _solves(scramble_str, solution_str):
+    cube = Cube()
+    cube.execute(scramble_str.split())
+    cube.execute(solution_str.split())
+    return cube.is_solved()
+
+
+class SolutionCacheTest(unittest.TestCase):
+    def test_symmetric_states(self):
+        cache = SolutionCache(":memory:")
+        scramble = "R U F' L2"
+        state = SOLVED_STATE[compile_moves(scramble.split())]
+        self.assertIsNone(cache.get(state))
+        cache.put(state, "L2 F U' R'".split())
+
+        # the same scramble seen from another side, and with its colors swapped
+        for other in ["R U F' L2", "y R U F' L2", "B U R' F2", "x' z R U F' L2"]:
+            solution = cache.get(SOLVED_STATE[compile_moves(other.split())])
+            self.assertIsNotNone(solution, other)
+            self.assertTrue(_solves(other, " ".join(solution)), other)
+        self.assertIsNone(cache.get(SOLVED_STATE[compile_moves(["R"])]))
+
+        # only a shorter solution replaces the one there is
+        cache.put(state, "L2 F U' R' U U'".split())
+        self.assertEqual(4, len(cache.get(state)))
+
+    def test_eviction(self):
+        cache = SolutionCache(":memory:", max_entries=2)
+        for scramble in ["R", "R U", "R U F"]:
+            cache.put(SOLVED_STATE[compile_moves(scramble.split())], "U".split())
+        self.assertEqual(2, len(cache))
+        self.assertIsNone(cache.get(SOLVED_STATE[compile_moves(["R"])]))
+
+
+class SolveServiceTest(unittest.TestCase):
+    def test_service(self):
+        scramble = "R' U' L2 B2 U2 F L2 B' L' B D R B F2 L F R' B2 F' L B' D B2 R2 D' U B2 F' D R2"
+
+        with tempfile.TemporaryDirectory() as directory:
+            socket_path = os.path.join(directory, "service.sock")
+
+            async def run():
+                service = SolveService((200, 300, 10, 20), workers=1, cache=SolutionCache(":memory:"))
+                await service.start(socket_path)
+                try:
+                    loop = asyncio.get_running_loop()
+                    return await loop.run_in_executor(None, request, [scramble, "y " + scramble, "R Q"],
+                                                      socket_path)
+                finally:
+                    await service.close()
+
+            first, rotated, bad = asyncio.run(run())
+
+        self.assertTrue(first["solved"])
+        self.assertFalse(first["cached"])
+        self.assertTrue(_solves(scramble, first["solution"]))
+        # it was waiting for the first one
+        self.assertTrue(rotated["solved"])
+        self.assertTrue(rotated["cached"])
+        self.assertTrue(_solves("y " + scramble, rotated["solution"]))
+        self.assertEqual(first["normalized"], rotated["normalized"][2:])
+        self.assertFalse(bad["solved"])
+        self.assertIn("Q", bad["error"])
+
+    def test_waiting_for_another_scramble(self):
+        # the cube seen from another side: the solution of the first one does not solve the second one,
+        # and there is no cache to go through
+        scramble = "R U F' L2 D B' R2"
+
+        async def run():
+            service = SolveService((200, 300, 10, 20), workers=1, cache=SolutionCache(":memory:", max_entries=0))
+            try:
+                return await asyncio.gather(service.solve(scramble, seed=1), service.solve(scramble + " y", seed=1))
+            finally:
+                await service.close()
+
+        first, rotated = asyncio.run(run())
+        self.assertTrue(_solves(scramble, first["solution"]))
+        self.assertTrue(rotated["solved"])
+        self.assertTrue(_solves(scramble + " y", rotated["solution"]))
+
+    def test_failed_solve(self):
+        # a worker pool that can't take the solve, the client still gets an answer
+        with tempfile.TemporaryDirectory() as directory:
+            socket_path = os.path.join(directory, "service.sock")
+
+            async def run():
+                service = SolveService((100, 100, 5, 10), workers=1, cache=SolutionCache(":memory:"))
+                await service.start(socket_path)
+                service.pool.shutdown()
+                try:
+                    loop = asyncio.get_running_loop()
+                    return await loop.run_in_executor(None, lambda: request(["R U"], socket_path, timeout=10.0))
+                finally:
+                    await service.close()
+
+            answer, = asyncio.run(run())
+
+        self.assertFalse(answer["solved"])
+        self.assertIn("Solve failed", answer["error"])
+        self.assertEqual(0, answer["id"])
+
+    def test_max_pending(self):
+        # requests that come in at the same time all count against max_pending
+        scrambles = ["R U F'", "L D2 B", "U' R2 F"]
+
+        async def run():
+            service = SolveService((100, 100, 5, 10), workers=1, cache=SolutionCache(":memory:"), max_pending=1)
+            try:
+                return await asyncio.gather(*[service.solve(s, seed=1) for s in scrambles]), service.pending
+            finally:
+                await service.close()
+
+        results, pending = asyncio.run(run())
+        self.assertEqual([True, False, False], [result["solved"] for result in results])
+        self.assertEqual(["Too many pending scrambles"] * 2, [result["error"] for result in results[1:]])
+        self.assertEqual(0, pending)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,35 @@
+import unittest
+
+import numpy as np
+
+from src.cube import MOVES, compile_moves
+from src.simplify import invert, merge_moves, push_rotations, simplify
+
+
+class SimplifyTest(unittest.TestCase):
+    def test_merge(self):
+        self.assertEqual(["D", "L"], merge_moves("U D U' R R L R2 F F'".split(" ")))
+        self.assertEqual(["R2"], merge_moves("R U U' R".split(" ")))
+        self.assertEqual([], merge_moves("M2 M M".split(" ")))
+
+    def test_push_rotations(self):
+        self.assertEqual(["R", "F", "x"], push_rotations("R x U".split(" ")))
+        self.assertEqual(["R", "F"], push_rotations("R x U".split(" "), keep_rotation=False))
+        self.assertEqual(["U"], simplify("x x' y U y'".split(" ")))
+
+    def test_invert(self):
+        self.assertEqual(["U'", "R2", "F"], invert("F' R2 U".split(" ")))
+        self.assertTrue(np.array_equal(np.arange(54), compile_moves(["R", "x'", "M2"] + invert(["R", "x'", "M2"]))))
+
+    def test_same_state(self):
+        rng = np.random.default_rng(0)
+        notations = list(MOVES)
+        for _ in range(500):
+            moves = list(rng.choice(notations, size=rng.integers(0, 40)))
+            for simplified in [simplify(moves), simplify(moves, slices=True), simplify(moves, rotations=False)]:
+                self.assertTrue(np.array_equal(compile_moves(moves), compile_moves(simplified)), moves)
+            self.assertLessEqual(len(simplify(moves)), len(moves) + 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+import os
+import tempfile
+import time
+import unittest
+
+from src.checkpoint import load as load_checkpoint
+from src.cube import Cube
+from src.metrics import Metrics, SolverListener
+from src.solver import Solver
+
+
+class SolverTest(unittest.TestCase):
+    def test_solve(self):
+        scramble = "D' B2 D2 L2 U' L R' F L2 R2 U' L2 B' L D' B2 R2 B' R F U2 R B2 F' L' B2 L2 R F2 L'".split(" ")
+        metrics = Metrics()
+        result = Solver(500, 300, 10, 50, seed=0).solve(scramble, listener=metrics)
+
+        self.assertTrue(result.is_solved)
+        self.assertEqual(scramble, result.scramble)
+        self.assertEqual(result.generations, metrics.generations)
+        self.assertEqual(result.generations * 500, result.evaluations)
+        self.assertEqual(0, metrics.best_fitness[-1])
+        self.assertEqual(result.evaluations, metrics.evaluations)
+        self.assertTrue(0 <= metrics.duplicate_rate < 1)
+
+        cube = Cube()
+        cube.execute(scramble)
+        cube.execute(result.algorithm)
+        self.assertTrue(cube.is_solved())
+
+    def test_not_solved(self):
+        result = Solver(10, 2, 1, 2, seed=0).solve("R U F".split(" "))
+        self.assertFalse(result.is_solved)
+        self.assertEqual([], result.algorithm)
+        self.assertEqual(2, result.generations)
+
+    def test_notation(self):
+        self.assertRaises(ValueError, Solver(10, 2, 1, 2).solve, "R U Q")
+        result = Solver(100, 100, 5, 10, seed=0).solve("r U' Fw2")
+        self.assertEqual(["R", "M'", "U'", "F2", "S2"], result.scramble)
+        self.assertTrue(result.is_solved)
+
+    def test_seed(self):
+        scramble = "R' U' L2 B2 U2 F L2 B' L' B D R B F2 L F R' B2 F' L B' D B2 R2 D' U B2 F' D R2".split(" ")
+        solver = Solver(200, 50, 1, 20)
+        first = solver.solve(scramble, seed=42)
+        second = solver.solve(scramble, seed=42)
+        self.assertEqual(first.algorithm, second.algorithm)
+        self.assertEqual(first.generations, second.generations)
+        self.assertEqual(first.algorithm, Solver(200, 50, 1, 20, seed=42).solve(scramble).algorithm)
+
+    def test_stagnation(self):
+        # a tiny population stops getting better after a few generations
+        scramble = "R U F D' L2 B".split(" ")
+        result = Solver(4, 100, 3, 1, seed=0, stagnation_limit=5).solve(scramble)
+        self.assertFalse(result.is_solved)
+        self.assertEqual(3, result.worlds)
+        self.assertLess(result.generations, 3 * 100)
+
+    def test_adaptive_mutations(self):
+        scramble = "R' U' L2 B2 U2 F L2 B' L' B D R B F2 L F R' B2 F' L B' D B2 R2 D' U B2 F' D R2".split(" ")
+        result = Solver(200, 300, 10, 20, seed=0, adaptive_mutations=True, stagnation_limit=40).solve(scramble)
+        self.assertTrue(result.is_solved)
+
+        cube = Cube()
+        cube.execute(scramble)
+        cube.execute(result.algorithm)
+        self.assertTrue(cube.is_solved())
+
+    def test_resume(self):
+        scramble = "R' U' L2 B2 U2 F L2 B' L' B D R B F2 L F R' B2 F' L B' D B2 R2 D' U B2 F' D R2".split(" ")
+        settings = dict(population_size=100, max_generations=60, max_resets=10, elitism_num=10,
+                        adaptive_mutations=True, deduplicate=True)
+        expected = Solver(**settings, seed=3).solve(scramble)
+        self.assertGreater(expected.worlds, 1)
+
+        class Interrupt(Exception):
+            pass
+
+        class Interrupter(SolverListener):
+            def on_generation(self, stats):
+                # time goes by in the middle of the world, the checkpoints after it count it
+                if stats.world == 1 and stats.generation == 10:
+                    time.sleep(0.2)
+                if stats.world == 1 and stats.generation == 20:
+                    raise Interrupt()
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "checkpoint.npz")
+            solver = Solver(**settings, seed=3, checkpoint_path=path, checkpoint_interval=0)
+            self.assertRaises(Interrupt, solver.solve, scramble, listener=Interrupter())
+            self.assertTrue(os.path.exists(path))
+            self.assertRaises(ValueError, solver.solve, scramble[1:], resume=True)
+            seconds = float(load_checkpoint(path)["seconds"])
+            self.assertGreaterEqual(seconds, 0.2)
+
+            # a new solver with another seed, everything comes from the checkpoint
+            result = Solver(**settings, seed=4, checkpoint_path=path).solve(scramble, resume=True)
+            self.assertFalse(os.path.exists(path))
+
+        self.assertEqual(expected.algorithm, result.algorithm)
+        self.assertEqual((expected.worlds, expected.generations), (result.worlds, result.generations))
+        self.assertGreater(result.seconds, seconds)
+
+
+if __name__ == '__main__':
+    unittest.main()
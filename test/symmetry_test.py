@@ -0,0 +1,48 @@
+import unittest
+
+import numpy as np
+
+from src.cube import MOVES, SOLVED_STATE, Cube, calculate_fitness, compile_moves
+from src.symmetry import ORIENTATION_MOVES, ORIENTATIONS, canonical_hashes, canonical_states, relabel_colors
+
+
+class SymmetryTest(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.states = np.stack([SOLVED_STATE[compile_moves(rng.choice(list(MOVES), size=20))] for _ in range(20)])
+
+    def test_orientations(self):
+        self.assertEqual(24, len({p.tobytes() for p in ORIENTATIONS}))
+        for moves, p in zip(ORIENTATION_MOVES, ORIENTATIONS):
+            self.assertTrue(np.array_equal(compile_moves(moves), p))
+            self.assertLessEqual(len(moves), 2)
+
+    def test_canonical(self):
+        hashes = canonical_hashes(self.states)
+        self.assertEqual(len(self.states), len(set(hashes.tolist())))
+
+        canonical, rotations = canonical_states(self.states)
+        for p in ORIENTATIONS:
+            rotated = self.states[:, p]
+            self.assertTrue(np.array_equal(hashes, canonical_hashes(rotated)))
+            self.assertTrue(np.array_equal(canonical, canonical_states(rotated)[0]))
+            self.assertTrue(np.array_equal(calculate_fitness(self.states), calculate_fitness(rotated)))
+
+        for state, c, r in zip(self.states, canonical, rotations):
+            self.assertTrue(np.array_equal(state[ORIENTATIONS[r]], c))
+
+    def test_relabel(self):
+        colors = np.array([3, 1, 0, 5, 2, 4], dtype=np.uint8)
+        self.assertFalse(np.array_equal(canonical_hashes(self.states), canonical_hashes(colors[self.states])))
+        self.assertTrue(np.array_equal(canonical_hashes(self.states, relabel=True),
+                                       canonical_hashes(colors[self.states], relabel=True)))
+
+        # the solved cube in any orientation
+        cube = Cube()
+        cube.execute(["x", "y'"])
+        self.assertTrue(np.array_equal(SOLVED_STATE, relabel_colors(cube.state)[0]))
+        self.assertEqual(canonical_hashes(SOLVED_STATE, relabel=True), canonical_hashes(cube.state, relabel=True))
+
+
+if __name__ == '__main__':
+    unittest.main()